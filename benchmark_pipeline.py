@@ -0,0 +1,140 @@
+# End-to-end pipeline benchmark
+# Generates deterministic synthetic footage (people-sized boxes walking across the frame at a given crowd density,
+# resolution and length), runs detection_video.py headless on it in several configurations and reports:
+# - fps: processed frames per second
+# - p99_frame_ms: 99th percentile of the frame latency
+# - peak_rss_mb: peak resident memory of the run
+# - counts: people counted up and down, next to the counts expected from the ground truth
+#   (visible centre moving more than a fifth of the frame height from where it first appeared, as PeopleCounter counts)
+# - mot: MOTA, MOTP, IDF1 and identity switches of the tracks against the ground truth of the footage
+# The stub detector stands in for the detection weights when they are absent (or with --detector stub).
+# Every run is appended as one JSON line to --output, along with the commit and the date, to compare over time.
+
+import subprocess
+import itertools
+import argparse
+import datetime
+import json
+import sys
+import os
+import re
+
+from functions.synthetic import synthetic_crowd
+from functions.motevaluation import read_mot, evaluate
+
+parser = argparse.ArgumentParser()
+
+parser.add_argument('-p', '--people', default = [5, 20], type = int, nargs = '+', help = 'average numbers of people in the scene')
+parser.add_argument('-r', '--resolution', default = ['800x600'], nargs = '+', help = 'resolutions of the synthetic videos, as WIDTHxHEIGHT')
+parser.add_argument('-n', '--frames', default = 300, type = int, help = 'number of frames of the synthetic videos')
+parser.add_argument('-s', '--seed', default = 0, type = int, help = 'random seed of the synthetic videos')
+parser.add_argument('--trackers', default = ['dlib', 'flow'], nargs = '+', help = 'short-term tracker engines')
+parser.add_argument('--skip_frames', default = [10, 30], type = int, nargs = '+', help = 'numbers of frames between detections')
+parser.add_argument('--gender', default = ['off', 'on'], nargs = '+', choices = ['on', 'off'], help = 'run with and/or without gender classification')
+parser.add_argument('--detector', default = 'auto', choices = ['auto', 'stub', 'model'], help = 'detection backend, auto uses the stub detector when the weights are absent')
+parser.add_argument('--work_dir', default = os.path.join('videos', 'synthetic'), help = 'directory of the synthetic videos and of the outputs')
+parser.add_argument('-o', '--output', default = 'benchmark_results.jsonl', help = 'file the results are appended to')
+
+args = parser.parse_args()
+
+def git_commit():
+    """Function to get the current commit, or None outside of a git checkout."""
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr = subprocess.DEVNULL, universal_newlines = True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_pipeline(command, log_path):
+    """
+    Function to run the pipeline and measure its peak memory.
+
+    Args:
+        command -> command line of detection_video.py.
+        log_path -> path the output of the run is written to.
+    Returns:
+        output -> output of the run.
+        returncode -> exit status of the run.
+        peak_rss_mb -> peak resident memory of the run in MB.
+    """
+    with open(log_path, 'w') as log:
+        process = subprocess.Popen(command, stdout = log, stderr = subprocess.STDOUT)
+        # wait4 gives the resource usage of this run alone, ru_maxrss is in KB on Linux
+        (_, status, usage) = os.wait4(process.pid, 0)
+        process.returncode = os.waitstatus_to_exitcode(status) if hasattr(os, 'waitstatus_to_exitcode') else status >> 8
+    with open(log_path) as log:
+        output = log.read()
+    return output, process.returncode, usage.ru_maxrss / 1024.0
+
+def parse_output(output):
+    """Function to read the fps, the p99 frame latency and the counts from the output of a run."""
+    result = {}
+    match = re.search(r'processed (\d+) frames in ([0-9.]+) seconds \(([0-9.]+) fps\)', output)
+    if match is not None:
+        result['frames'] = int(match.group(1))
+        result['fps'] = float(match.group(3))
+    # the last stage summary is the final one
+    rows = re.findall(r'^\s*frame\s+\d+\s+[0-9.]+\s+[0-9.]+\s+[0-9.]+\s+([0-9.]+)\s*$', output, re.MULTILINE)
+    if len(rows) > 0:
+        result['p99_frame_ms'] = float(rows[-1])
+    match = re.search(r': up (\d+) \(female (\d+), male (\d+)\), down (\d+) \(female (\d+), male (\d+)\)', output)
+    if match is not None:
+        result['counts'] = {'up': int(match.group(1)), 'down': int(match.group(4))}
+    return result
+
+# The stub detector replaces the weights when they are absent, gender classification needs models/model.h5
+detector = args.detector
+if detector == 'auto':
+    detector = 'model' if os.path.isdir('models/efficientdet_d0_coco17_tpu-32') else 'stub'
+gender_available = os.path.isfile(os.path.join('models', 'model.h5'))
+print('[INFO] detector: {}, gender model: {}'.format(detector, 'found' if gender_available else 'missing'))
+
+os.makedirs(args.work_dir, exist_ok = True)
+commit = git_commit()
+date = datetime.datetime.now().isoformat()
+
+for (resolution, people) in itertools.product(args.resolution, args.people):
+    (width, height) = [int(v) for v in resolution.split('x')]
+    name = 'crowd_{}_{}x{}_{}f_seed{}'.format(people, width, height, args.frames, args.seed)
+    video_path = os.path.join(args.work_dir, name + '.avi')
+    gt_path = os.path.join(args.work_dir, name + '_gt.txt')
+
+    # The videos are deterministic, the expected counts are recomputed along with them
+    print('[INFO] generating {} ...'.format(video_path))
+    expected = synthetic_crowd(video_path, people = people, frames = args.frames, width = width, height = height,
+        seed = args.seed, gtPath = gt_path)
+
+    for (tracker, skip_frame, gender) in itertools.product(args.trackers, args.skip_frames, args.gender):
+        config = {'tracker': tracker, 'skip_frame': skip_frame, 'gender': gender, 'detector': detector,
+            'people': people, 'resolution': resolution, 'frames': args.frames, 'seed': args.seed}
+        record = {'date': date, 'commit': commit, 'config': config, 'expected_counts': expected}
+
+        if gender == 'on' and not gender_available:
+            record['status'] = 'skipped: models/model.h5 is missing'
+        else:
+            tag = '{}_{}_f{}_gender{}'.format(name, tracker, skip_frame, gender)
+            command = [sys.executable, 'detection_video.py', '--headless', '-i', video_path, '--tracker', tracker,
+                '-f', str(skip_frame), '-o', os.path.join(args.work_dir, tag + '_output.avi'), '-g', '',
+                '--profile_interval', '0', '--tracks', os.path.join(args.work_dir, tag + '_tracks.txt')]
+            if detector == 'stub':
+                command += ['-b', 'stub']
+            if gender == 'off':
+                command += ['--no_gender']
+
+            output, returncode, peak_rss_mb = run_pipeline(command, os.path.join(args.work_dir, tag + '.log'))
+            record.update(parse_output(output))
+            record['peak_rss_mb'] = peak_rss_mb
+            record['status'] = 'ok' if returncode == 0 else 'failed ({})'.format(returncode)
+            if returncode == 0:
+                metrics = evaluate(read_mot(gt_path, groundTruth = True), read_mot(os.path.join(args.work_dir, tag + '_tracks.txt')))
+                record['mot'] = {key: metrics[key] for key in ['MOTA', 'MOTP', 'IDF1', 'id_switches']}
+
+        print('{:>10} {:>4} people {:>5} f={:<3} gender {:<3} {:>8} fps {:>8} p99 ms {:>8} MB MOTA {:>6} counts {} (expected {}) {}'.format(
+            resolution, people, tracker, skip_frame, gender, record.get('fps', '-'), record.get('p99_frame_ms', '-'),
+            '{:.0f}'.format(record['peak_rss_mb']) if 'peak_rss_mb' in record else '-',
+            '{:.3f}'.format(record['mot']['MOTA']) if 'mot' in record else '-', record.get('counts', '-'),
+            expected, record['status']))
+
+        with open(args.output, 'a') as f:
+            f.write(json.dumps(record) + '\n')
+
+print('[INFO] results appended to {}'.format(args.output))
@@ -0,0 +1,49 @@
+# Cold-start benchmark
+# Runs detection_video.py several times on its first frame only and reports:
+# - cold start: wall time of the whole process, from launch to exit
+# - first frame: time from the first line of the script to the first processed frame
+# Any extra argument is passed to detection_video.py, e.g. python benchmark_startup.py -- -i videos/clip.mp4
+
+import subprocess
+import argparse
+import time
+import sys
+import re
+
+parser = argparse.ArgumentParser()
+
+parser.add_argument('-n', '--runs', default = 5, type = int, help = 'number of runs')
+parser.add_argument('--budget', default = None, type = float, help = 'maximum median time to first frame in seconds, the benchmark fails above it')
+parser.add_argument('extra', nargs = argparse.REMAINDER, help = 'arguments passed to detection_video.py')
+
+args = parser.parse_args()
+
+extra = [arg for arg in args.extra if arg != '--']
+command = [sys.executable, 'detection_video.py', '--headless', '--max_frames', '1', '-o', 'videos/startup.avi', '-g', ''] + extra
+
+def median(values):
+    """Function to compute the median of a list of numbers."""
+    values = sorted(values)
+    middle = len(values) // 2
+    return values[middle] if len(values) % 2 == 1 else (values[middle - 1] + values[middle]) / 2.0
+
+cold_starts = []
+first_frames = []
+for run in range(args.runs):
+    start_time = time.time()
+    result = subprocess.run(command, stdout = subprocess.PIPE, stderr = subprocess.STDOUT, universal_newlines = True)
+    cold_starts.append(time.time() - start_time)
+
+    match = re.search(r'time to first processed frame: ([0-9.]+) seconds', result.stdout)
+    if result.returncode != 0 or match is None:
+        print(result.stdout)
+        sys.exit('[ERROR] run {} failed'.format(run))
+    first_frames.append(float(match.group(1)))
+    print('[INFO] run {}: cold start {:.2f} s, first frame {:.2f} s'.format(run, cold_starts[-1], first_frames[-1]))
+
+print('{:>12} {:>10} {:>10} {:>10}'.format('', 'min', 'median', 'max'))
+for (name, values) in [('cold start', cold_starts), ('first frame', first_frames)]:
+    print('{:>12} {:>10.2f} {:>10.2f} {:>10.2f}'.format(name, min(values), median(values), max(values)))
+
+if args.budget is not None and median(first_frames) > args.budget:
+    sys.exit('[ERROR] median time to first frame {:.2f} s is over the budget of {:.2f} s'.format(median(first_frames), args.budget))
@@ -0,0 +1,74 @@
+# Short-term tracker benchmark
+# Compares the per-frame cost of the short-term tracker engines on synthetic footage:
+# - dlib serial: one dlib correlation tracker per person updated one after the other (the original loop)
+# - dlib threaded: the same trackers updated by a thread pool
+# - flow: every box propagated by a single sparse optical flow call
+
+import numpy as np
+import argparse
+import time
+
+from functions.shorttermtracker import DlibTracker, OpticalFlowTracker
+
+parser = argparse.ArgumentParser()
+
+parser.add_argument('-p', '--people', default = [5, 10, 30], type = int, nargs = '+', help = 'numbers of people in the scene')
+parser.add_argument('-n', '--frames', default = 200, type = int, help = 'number of tracked frames per run')
+parser.add_argument('-t', '--threads', default = 4, type = int, help = 'number of threads of the threaded dlib engine')
+parser.add_argument('-s', '--seed', default = 0, type = int, help = 'random seed of the synthetic scene')
+
+args = parser.parse_args()
+
+def synthetic_scene(people, frames, seed, width = 800, height = 600):
+    """
+    Function to generate frames of textured people-sized boxes moving over a textured background.
+
+    Args:
+        people -> number of boxes.
+        frames -> number of frames.
+        seed -> random seed.
+    Returns:
+        frames -> list of RGB frames as numpy arrays.
+        boxes -> numpy array of the (xmin, ymin, xmax, ymax) boxes on the first frame.
+    """
+    rng = np.random.RandomState(seed)
+    background = (rng.rand(height, width, 3) * 255).astype(np.uint8)
+    sprites = [(rng.rand(80, 40, 3) * 255).astype(np.uint8) for _ in range(people)]
+    starts = rng.rand(people, 2) * [width - 100, height - 140] + [10, 10]
+    velocities = rng.uniform(-2, 2, (people, 2))
+
+    result = []
+    for i in range(frames):
+        frame = background.copy()
+        positions = starts + velocities * i
+        positions = np.clip(positions, 0, [width - 40, height - 80]).astype(int)
+        for (sprite, (x, y)) in zip(sprites, positions):
+            frame[y:y + 80, x:x + 40] = sprite
+        result.append(frame)
+
+    boxes = np.hstack([starts.astype(int), starts.astype(int) + [40, 80]])
+    return result, boxes
+
+def run(tracker, frames, boxes):
+    """Function to measure the mean update time of a tracker engine, in milliseconds."""
+    tracker.start(frames[0], boxes)
+    start_time = time.time()
+    for frame in frames[1:]:
+        tracker.update(frame)
+    elapsed = time.time() - start_time
+    tracker.close()
+    return 1000.0 * elapsed / (len(frames) - 1)
+
+engines = [('flow', lambda: OpticalFlowTracker())]
+try:
+    import dlib
+    engines = [('dlib serial', lambda: DlibTracker(threads = 1)),
+        ('dlib threaded', lambda: DlibTracker(threads = args.threads))] + engines
+except ImportError:
+    print('[INFO] dlib is not installed, only the optical flow engine is benchmarked')
+
+print('{:>8} {:>15} {:>12}'.format('people', 'engine', 'ms/frame'))
+for people in args.people:
+    frames, boxes = synthetic_scene(people, args.frames, args.seed)
+    for (name, engine) in engines:
+        print('{:>8} {:>15} {:>12.2f}'.format(people, name, run(engine(), frames, boxes)))
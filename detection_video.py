@@ -5,44 +5,32 @@
 # at Bisa AI x Institut Teknologi Bandung (Indonesia)
 
 # Libraries
+# Only light libraries are imported at startup. TensorFlow and the models are loaded on a background
+# thread while the video sources are opened (see Model Loading), dlib only by the dlib tracker engine.
+import time
+startup_time = time.time()
+
 import numpy as np
 import cv2
 print('[INFO] cv2 imported. cv2 version: {}'.format(cv2.__version__))
-import pandas as pd
-import dlib
-print('[INFO] dlib imported. dlib version: {}'.format(dlib.__version__))
-import imutils
-print('[INFO] imutils imported. imutils version: {}'.format(imutils.__version__))
-
-from matplotlib import pyplot as plt
-import csv
-import time
+from concurrent.futures import ThreadPoolExecutor
 import argparse
-import math
 import os
-import datetime
-print('[INFO] supporting libraries imported.')
-
-from functions.centroidtracker import CentroidTracker
-print('[INFO] functions/centroidtracker imported')
-from functions.trackableobject import TrackableObject, GenderObject
-print('[INFO] functions/trackableobject imported')
-
-from functions import config_util
-print('[INFO] config util loaded')
-
-from functions import label_map_util
-print('[INFO] label map util imported')
-
-from object_detection.builders import model_builder
-print('[INFO] model builder loaded')
 
-print('[INFO] importing tensorflow...')
-import tensorflow as tf
-from tensorflow.keras.models import load_model
-print('[INFO] tensorflow imported. tensorflow version: {}'.format(tf.__version__))
-
-tf.get_logger().setLevel('ERROR')
+from functions.peoplecounter import PeopleCounter
+from functions.sorttracker import SortTracker
+from functions.framesource import FrameSource
+from functions.detectorworker import DetectorWorker
+from functions.stream import Stream
+from functions.logger import TrackLogger, MOTWriter
+from functions.detectionfilter import DetectionFilter
+from functions.scheduler import DetectionScheduler
+from functions.motiongate import MotionGate
+from functions.roi import RegionOfInterest, in_regions
+from functions.shorttermtracker import create_tracker
+from functions.profiler import StageProfiler
+from functions.videosink import VideoSink
+print('[INFO] functions imported')
 
 # Parser
 # Specify all the parameters needed by the end user in order to get desirable outcome.
@@ -50,13 +38,52 @@ tf.get_logger().setLevel('ERROR')
 parser = argparse.ArgumentParser()
 
 parser.add_argument('-m', '--model', default = 'efficientdet', help = 'Model name to be used. Choose between [ssd inception, ssd mobilenet, faster rcnn resnet]')
-parser.add_argument('-i', '--input_path', default = 'videos/WalkByShop1cor.mpg', help ='path of file')
-parser.add_argument('-f', '--skip_frame', default = 20, help='number of frames skipped for each detection')
-parser.add_argument('-c', '--classes_to_detect', default = ['person'], help = 'classes name to detect')
-parser.add_argument('-d', '--distance_threshold', default = 70, help = 'maximum distance of object displacement to be considered as one object')
-parser.add_argument('-l', '--longest_disappear', default = 15, help = 'maximum number of frames the object disappeared')
+parser.add_argument('-b', '--backend', default = 'auto', choices = ['auto', 'saved_model', 'cached', 'checkpoint', 'tflite', 'stub'], help = 'load the detection model from its exported saved_model, from the traced graph cached under --cache_dir, rebuild it from its checkpoint, or run its TFLite conversion. auto uses the saved_model when there is one, the cache otherwise. stub finds the people of synthetic footage without any weights (benchmarks)')
+parser.add_argument('--quantized', action = 'store_true', help = 'run the int8 models written by quantize_models.py: model_int8.tflite for the detector (--backend tflite, the default with this flag) and models/model_int8.tflite for the gender classifier')
+parser.add_argument('--tflite_threads', default = 1, type = int, help = 'number of CPU threads of the TFLite interpreter (--backend tflite)')
+parser.add_argument('--cache_dir', default = os.path.join('models', 'cache'), help = 'directory of the traced detection graphs, keyed by model name, checkpoint hash and input shape')
+parser.add_argument('-i', '--input_path', default = ['videos/WalkByShop1cor.mpg'], nargs = '+', help ='path of file. Pass several paths to process several cameras in one process')
+parser.add_argument('-f', '--skip_frame', default = 20, type = int, help='number of frames skipped for each detection')
+parser.add_argument('--adaptive_detection', action = 'store_true', help = 'adapt the number of frames between detections to the scene, between --min_skip and --max_skip')
+parser.add_argument('--min_skip', default = 5, type = int, help = 'minimum number of frames between detections with --adaptive_detection')
+parser.add_argument('--max_skip', default = 60, type = int, help = 'maximum number of frames between detections with --adaptive_detection')
+parser.add_argument('--tracker_confidence', default = None, type = float, help = 'tracker confidence under which --adaptive_detection runs a new detection (default: the lost confidence of the tracker engine)')
+parser.add_argument('--tracker', default = 'dlib', choices = ['dlib', 'flow'], help = 'short-term tracker engine: dlib correlation trackers or sparse optical flow')
+parser.add_argument('--tracker_threads', default = 1, type = int, help = 'number of threads updating the dlib correlation trackers')
+parser.add_argument('--motion_gate', action = 'store_true', help = 'skip detection and tracking on frames without motion')
+parser.add_argument('--motion_threshold', default = 25, type = int, help = 'minimum pixel difference to the background for a pixel to count as moving')
+parser.add_argument('--motion_area', default = 0.001, type = float, help = 'minimum fraction of moving pixels for a frame to be processed')
+parser.add_argument('-r', '--roi', default = [], nargs = '*', help = 'regions of interest in resized frame coordinates, as x1,y1,x2,y2 (rectangle) or x1,y1,x2,y2,x3,y3,... (polygon)')
+parser.add_argument('-c', '--classes_to_detect', default = ['person'], nargs = '+', help = 'classes name to detect')
+parser.add_argument('-t', '--threshold', default = 0.5, type = float, help = 'minimum detection score')
+parser.add_argument('--class_thresholds', default = [], nargs = '*', help = 'minimum detection score per class, as name=score (e.g. person=0.6)')
+parser.add_argument('--top_k', default = None, type = int, help = 'maximum number of detections kept per frame')
+parser.add_argument('-d', '--distance_threshold', default = 70, type = int, help = 'maximum distance of object displacement to be considered as one object')
+parser.add_argument('-l', '--longest_disappear', default = 15, type = int, help = 'maximum number of frames the object disappeared')
+parser.add_argument('--association', default = 'centroid', choices = ['centroid', 'sort'], help = 'object association: nearest centroid, or Kalman filter and IoU (SORT)')
+parser.add_argument('--iou_threshold', default = 0.3, type = float, help = 'minimum IoU between a predicted and a detected box to be considered as one object (--association sort)')
 parser.add_argument('-g', '--log', default = True, help = 'Save the log?')
+parser.add_argument('--no_gender', action = 'store_true', help = 'count people without classifying their gender')
+parser.add_argument('--gender_votes', default = 3, type = int, help = 'number of gender votes before the gender of an object is final')
+parser.add_argument('--gender_confidence', default = 0.0, type = float, help = 'minimum gender classifier confidence for a vote to count')
+parser.add_argument('--tracks', default = None, help = 'path of a MOTChallenge-style file of the tracked boxes of every frame, in source video coordinates, for evaluate_mot.py')
+parser.add_argument('--log_flush_rows', default = 500, type = int, help = 'number of buffered log rows written at once')
+parser.add_argument('--log_flush_seconds', default = 5.0, type = float, help = 'maximum number of seconds log rows stay buffered')
+parser.add_argument('--log_max_mb', default = 64, type = int, help = 'size in MB at which the log file is rotated, 0 disables rotation')
+parser.add_argument('--expired_cache', default = 0, type = int, help = 'number of recently expired objects kept to be recovered, with their ID, count and gender, when a new object appears within --distance_threshold of where they were last seen')
+parser.add_argument('--expired_age', default = 30, type = int, help = 'maximum number of frames after expiring for an object to be recovered (--expired_cache)')
+parser.add_argument('--queue_size', default = 4, type = int, help = 'number of decoded frames buffered ahead of the detection loop')
+parser.add_argument('-a', '--async_detection', action = 'store_true', help = 'run detection on a worker thread while tracking continues')
+parser.add_argument('--max_frames', default = 0, type = int, help = 'stop each stream after this number of frames, 0 processes the whole stream')
+parser.add_argument('--profile_interval', default = 10.0, type = float, help = 'number of seconds between two summaries of the stage latencies, 0 only prints the final summary')
+parser.add_argument('--headless', action = 'store_true', help = 'process without display and as fast as possible (offline processing of recorded footage)')
 parser.add_argument('-o', '--output', default = 'videos/output.avi', help ='path to written video file')
+parser.add_argument('--output_codec', default = 'MJPG', help = 'FourCC of the written video')
+parser.add_argument('--output_fps', default = None, type = float, help = 'frame rate of the written video (default: the frame rate of the source divided by --output_every)')
+parser.add_argument('--output_scale', default = 1.0, type = float, help = 'scale of the written frames relative to the processed frames')
+parser.add_argument('--output_every', default = 1, type = int, help = 'write only every k-th frame')
+parser.add_argument('--output_queue', default = 8, type = int, help = 'number of frames queued for the video writer thread')
+parser.add_argument('--output_drop', action = 'store_true', help = 'drop frames when the video writer falls behind instead of waiting for it')
 
 args = parser.parse_args()
 
@@ -69,45 +96,26 @@ def load_image_into_numpy_array(image):
     return np.array(image.getdata()).reshape(
         (im_height, im_width, 3)).astype(np.uint8)
 
-def clean_detection_result(boxes, classes, scores, classes_to_detect, threshold = 0.5):
-    """
-    Function to remove all prediction results that are not included in classes_to_detect.
-    In default, this function will remove all predictions other than 'person' type.
-
-    Args:
-        boxes, classes, scores -> detection from TF2 Object Detection Model.
-        classes_to_detect -> list of strings. default: ['person']
-        threshold -> minimum score
-    Returns:
-        new_boxes, new_classes, new_scores -> numpy array of cleaned prediction result.
-    """
-    new_boxes = []
-    new_classes = []
-    new_scores = []
-    for i in range(scores.shape[0]):
-        if scores[i]>threshold and category_index[classes[i]]['name'] in classes_to_detect:
-            new_boxes.append(boxes[i])
-            new_classes.append(classes[i])
-            new_scores.append(scores[i])
-    return np.asarray(new_boxes), np.asarray(new_classes), np.asarray(new_scores)
+# Instrumentation
+# Every stage of the loop records its duration in a histogram, the p50/p95/p99 latencies are printed every
+# --profile_interval seconds and at the end
+profiler = StageProfiler(stages = ['capture', 'decode', 'resize', 'motion', 'detection', 'tracking', 'gender',
+    'association', 'drawing', 'write', 'encode', 'logging', 'frame'], interval = args.profile_interval)
 
 #------------VIDEO STREAM--------------
 # Define the video stream
 print('[INFO] creating video capture ...')
-if args.input_path == '0' or args.input_path == 'webcam':
-    cap = cv2.VideoCapture(0) 
-else:
-    cap = cv2.VideoCapture(args.input_path)  # Change only if you have more than one webcams 
 
-fps = cap.get(cv2.CAP_PROP_FPS)
+def stream_path(path, index, count):
+    """Function to give each stream its own output file when several streams are processed."""
+    if path is None or count == 1:
+        return path
+    root, ext = os.path.splitext(path)
+    return '{}_{}{}'.format(root, index, ext)
 
 #Target size of the video stream
 font = cv2.FONT_HERSHEY_SIMPLEX
 
-writer = None
-W = None
-H = None
-
 # Model choosing
 # -----------DETECTION MODEL-----------------
 # Note for user:
@@ -127,244 +135,423 @@ MODEL_NAME = modelname[args.model]
 PATH_TO_CKPT = os.path.join('models', os.path.join(MODEL_NAME, 'checkpoint/'))
 # List of the strings that is used to add correct label for each box.
 PATH_TO_CFG = os.path.join('models', os.path.join(MODEL_NAME, 'pipeline.config'))
+# Model exported with object_detection/exporter_lib_v2.py (image_tensor input)
+PATH_TO_SAVED_MODEL = os.path.join('models', os.path.join(MODEL_NAME, 'saved_model'))
+# SSD converted to TFLite with the TFLite_Detection_PostProcess op
+PATH_TO_TFLITE = os.path.join('models', os.path.join(MODEL_NAME, 'model_int8.tflite' if args.quantized else 'model.tflite'))
 PATH_TO_LABELS = os.path.join('label', 'mscoco_label_map.pbtxt')
 # Number of classes to detect
 NUM_CLASSES = 90
 
-#----------------HUMAN COUNTER-----------------
-humancounter = 0
-first_detection = True
-
-# Loading label map
-# Label maps map indices to category names, so that when our convolution network predicts `5`, we know that this corresponds to `airplane`.  Here we use internal utility functions, but anything that returns a dictionary mapping integers to appropriate string labels would be fine
-category_index = label_map_util.create_category_index_from_labelmap(PATH_TO_LABELS, use_display_name=True)
+# Model Loading
+# TensorFlow, the label map, the detection model and the gender classifier are loaded on a background
+# thread while the video sources are opened and start decoding. The models are then traced on blank
+# frames of the expected size, so the first frame does not pay for tracing.
+def load_models():
+    """
+    Function to load the label map, the detection filter, the detection model and the gender classifier,
+    importing tensorflow only when the chosen backend or gender model needs it.
+    """
+    global category_index, detection_filter, detector, gender_classifier
+
+    backend = args.backend
+    if backend == 'auto' and args.quantized:
+        backend = 'tflite'
+    if backend == 'auto':
+        backend = 'saved_model' if os.path.isdir(PATH_TO_SAVED_MODEL) else 'cached'
+
+    # TensorFlow is only imported for the backends and the gender model that need it: the stub and TFLite
+    # backends and the quantized gender model run without it (tflite_runtime is used when it is installed,
+    # TFLite models holding TensorFlow (Flex) ops import it when they are loaded)
+    if backend not in ['stub', 'tflite'] or not (args.no_gender or args.quantized):
+        print('[INFO] importing tensorflow...')
+        import tensorflow as tf
+        print('[INFO] tensorflow imported. tensorflow version: {}'.format(tf.__version__))
+        tf.get_logger().setLevel('ERROR')
+
+    # Loading label map
+    # Label maps map indices to category names, so that when our convolution network predicts `5`, we know that this corresponds to `airplane`.  Here we use internal utility functions, but anything that returns a dictionary mapping integers to appropriate string labels would be fine
+    # The stub detector only reports people
+    if args.backend == 'stub':
+        category_index = {1: {'id': 1, 'name': 'person'}}
+    else:
+        from functions import label_map_util
+        category_index = label_map_util.create_category_index_from_labelmap(PATH_TO_LABELS, use_display_name=True)
+
+    # Detection filter
+    # The score threshold of every class is looked up in a table built once from the label map and classes_to_detect
+    class_thresholds = {}
+    for item in args.class_thresholds:
+        name, score = item.rsplit('=', 1)
+        class_thresholds[name] = float(score)
+    detection_filter = DetectionFilter(category_index, args.classes_to_detect, threshold = args.threshold,
+        classThresholds = class_thresholds, topK = args.top_k)
+
+    # The exported saved_model takes uint8 frames and loads without the model builder or the protos.
+    # The cached backend traces the checkpoint once per input shape and saves the graph under --cache_dir,
+    # later runs load the traced graph. The input shape is pinned by the warm-up.
+    # The checkpoint path rebuilds the model from pipeline.config.
+    # The TFLite backend runs model.tflite on the CPU (XNNPACK) with --tflite_threads threads.
+    # The stub backend finds the people of the synthetic footage of benchmark_pipeline.py.
+    print('[INFO] loading detection model ...')
+    if backend == 'stub':
+        from functions.synthetic import StubDetector
+        detector = StubDetector()
+    elif backend == 'tflite':
+        from functions.tflitedetector import TFLiteDetector
+        detector = TFLiteDetector(PATH_TO_TFLITE, threads = args.tflite_threads)
+    else:
+        from functions.detectors import CheckpointDetector, SavedModelDetector, CachedDetector
+        if backend == 'saved_model':
+            detector = SavedModelDetector(PATH_TO_SAVED_MODEL)
+        elif backend == 'cached':
+            detector = CachedDetector(MODEL_NAME, PATH_TO_CFG, os.path.join(PATH_TO_CKPT, 'ckpt-0'), cacheDir = args.cache_dir)
+        else:
+            detector = CheckpointDetector(PATH_TO_CFG, os.path.join(PATH_TO_CKPT, 'ckpt-0'))
+    print('[INFO] detection model loaded ({})'.format(backend))
+
+    # Gender Model Loading
+    # Feel free to use any gender classification model in h5 format
+    # The output of the prediction an array with length 2, each of them represents the confidence of
+    # 'woman' and 'man' class
+    # With --quantized the int8 TFLite conversion written by quantize_models.py is used
+    if args.no_gender:
+        gender_classifier = None
+        return
+    print('[INFO] loading gender classifier model...')
+    from functions.genderclassifier import GenderClassifier, TFLiteModel
+    if args.quantized:
+        gender_model = TFLiteModel('models/model_int8.tflite', threads = args.tflite_threads)
+    else:
+        from tensorflow.keras.models import load_model
+        gender_model = load_model('models/model.h5')
+    g_classes = ['woman', 'man']
+    gender_classifier = GenderClassifier(gender_model, g_classes)
+    print('[INFO] gender classifier model loaded')
 
-#Object Tracking Helper Code
-ct = CentroidTracker(maxDisappeared=args.longest_disappear, maxDistance=args.distance_threshold)
-trackers = []
-trackableObjects = {}
-genderObjects = {}
+def warm_up_models(shapes):
+    """
+    Function to trace the detection model and the gender classifier before the first frame.
 
-framecount = 0
-totalDown = 0
-totalUp = 0
+    Args:
+        shapes -> list of the expected (height, width, 3) frame shapes of the streams.
+    """
+    if len(shapes) > 0:
+        run_detection_frames([np.zeros(shape, dtype=np.uint8) for shape in shapes])
+        if getattr(detector, 'shape', None) is not None:
+            print('[INFO] detection graph pinned to {}x{} ({})'.format(detector.shape[1], detector.shape[0],
+                'loaded from cache' if detector.cached else 'traced and cached'))
+    if gender_classifier is not None:
+        gender_classifier.classify(np.zeros((64, 64, 3), dtype=np.uint8), {0: (0, 0, 32, 32)})
+    print('[INFO] models warmed up')
+
+model_loader = ThreadPoolExecutor(max_workers = 1)
+models_loaded = model_loader.submit(load_models)
+
+def run_detection_batch(images):
+    """
+    Function to run the detection model on several frames in one call and keep only the boxes of classes_to_detect.
+    Frames of different sizes are padded at the bottom and right to a common size, with zeros or with the
+    padValue of the detector.
 
-womanUp = 0
-womanDown = 0
-manUp = 0
-manDown = 0
+    Args:
+        images -> list of BGR frames as numpy arrays.
+    Returns:
+        list of numpy arrays of [ymin, xmin, ymax, xmax] boxes in pixel coordinates, one per frame.
+    """
+    h = max(image.shape[0] for image in images)
+    w = max(image.shape[1] for image in images)
+    batch = np.full((len(images), h, w, 3), getattr(detector, 'padValue', 0), dtype=np.uint8)
+    for (i, image) in enumerate(images):
+        batch[i, :image.shape[0], :image.shape[1]] = image
 
-# Model Loading
-print('[INFO] loading detection model ...')
-configs = config_util.get_configs_from_pipeline_file(PATH_TO_CFG)
-model_config = configs['model']
-detection_model = model_builder.build(model_config=model_config, is_training = False)
-
-ckpt = tf.compat.v2.train.Checkpoint(model = detection_model)
-ckpt.restore(os.path.join(PATH_TO_CKPT, 'ckpt-0')).expect_partial()
-print('[INFO] detection model loaded')
-
-# Logger
-if args.log:
-    log_fields = ['timestamp', 'video time', 'track information', 'total up', 'man up', 'woman up', 'total down', 'man down', 'woman down']
-    with open('log.csv', 'w') as f:
-        log_writer = csv.writer(f)
-        log_writer.writerow(log_fields)
-
-# Gender Model Loading
-# Feel free to use any gender classification model in h5 format
-# The output of the prediction an array with length 2, each of them represents the confidence of
-# 'woman' and 'man' class
-print('[INFO] loading gender classifier model...')
-gender_model = load_model('models/model.h5')
-g_classes = ['woman', 'man']
-print('[INFO] gender classifier model loaded')
-
-@tf.function
-def detect_fn(image):
-    """Detect objects in image."""
-
-    image, shapes = detection_model.preprocess(image)
-    prediction_dict = detection_model.predict(image, shapes)
-    detections = detection_model.postprocess(prediction_dict, shapes)
-
-    return detections, prediction_dict, tf.reshape(shapes, [-1])
+    with profiler.measure('detection'):
+        all_boxes, all_classes, all_scores = detector.detect(batch)
 
-# Detection
-while True:
-    #Initialize start time to count time elapsed for each frame.
-    start_time = time.time()
+    results = []
+    for (boxes, classes, scores) in zip(all_boxes, all_classes, all_scores):
+        # Remove all results that are not a member of [classes_to_detect] and has score lower than the class threshold
+        boxes, classes, scores = detection_filter.filter(boxes, classes, scores)
 
-    # Read frame from camera
-    ret, image_np = cap.read()
+        results.append((boxes*np.array([h, w, h, w])).astype('int').reshape(-1, 4))
+    return results
 
-    image_np = imutils.resize(image_np, width = 800)
+# Regions of interest
+# Only the bounding rectangles of the regions go through the detector, objects centred outside every region are ignored
+regions = [RegionOfInterest.parse(text) for text in args.roi]
 
-    if W is None or H is None:
-        (H, W) = image_np.shape[:2]
+def run_detection_frames(images):
+    """
+    Function to run the detection model on the regions of interest of several frames in one batched call.
+    Without regions of interest the whole frames go through the detector.
 
-    rgb = cv2.cvtColor(image_np, cv2.COLOR_BGR2RGB)
+    Args:
+        images -> list of BGR frames as numpy arrays.
+    Returns:
+        list of numpy arrays of [ymin, xmin, ymax, xmax] boxes in frame pixel coordinates, one per frame.
+        Boxes centred outside every region of interest are removed.
+    """
+    if len(regions) == 0:
+        return run_detection_batch(images)
+
+    crops = []
+    owners = []
+    for (i, image) in enumerate(images):
+        for region in regions:
+            crop, (x, y) = region.crop(image)
+            crops.append(crop)
+            owners.append((i, x, y))
+
+    results = [[] for image in images]
+    for ((i, x, y), boxes) in zip(owners, run_detection_batch(crops)):
+        # Map the boxes of the crop back to frame coordinates
+        boxes = boxes + np.array([y, x, y, x])
+        keep = np.array([in_regions(regions, (xmin + xmax) / 2.0, (ymin + ymax) / 2.0) for (ymin, xmin, ymax, xmax) in boxes], dtype=bool)
+        results[i].append(boxes[keep])
+    return [np.concatenate(boxes).reshape(-1, 4) for boxes in results]
+
+def run_detection(image):
+    """
+    Function to run the detection model on a frame and keep only the boxes of classes_to_detect.
 
-    if args.output is not None and writer is None:
-        fourcc = cv2.VideoWriter_fourcc(*"MJPG")
-        writer = cv2.VideoWriter(args.output, fourcc, 30, (W, H), True)
+    Args:
+        image -> BGR frame as numpy array.
+    Returns:
+        boxes -> numpy array of [ymin, xmin, ymax, xmax] boxes in pixel coordinates.
+    """
+    return run_detection_frames([image])[0]
+
+#----------------STREAMS-----------------
+# Each input gets its own frame source, people counter, trackers, output video and log file.
+# The detection and gender models are shared by all streams.
+# Frames are decoded, resized and colour-converted on a background thread.
+# Live cameras drop stale frames instead of queueing them.
+streams = []
+live_input = False
+for (index, input_path) in enumerate(args.input_path):
+    live = input_path == '0' or input_path == 'webcam'
+    live_input = live_input or live
+    if live:
+        frame_source = FrameSource(0, width = 800, queueSize = args.queue_size, dropFrames = True, profiler = profiler) # Change only if you have more than one webcams 
+    else:
+        frame_source = FrameSource(input_path, width = 800, queueSize = args.queue_size, profiler = profiler)
+
+    #Object Tracking Helper Code
+    tracker = None
+    if args.association == 'sort':
+        tracker = SortTracker(maxDisappeared=args.longest_disappear, iouThreshold=args.iou_threshold)
+    counter = PeopleCounter(maxDisappeared=args.longest_disappear, maxDistance=args.distance_threshold,
+        genderVotes=args.gender_votes, genderConfidence=args.gender_confidence, maxExpired=args.expired_cache,
+        expiredAge=args.expired_age, tracker=tracker)
+
+    # Asynchronous detection
+    # Detection runs on a worker thread for frame N while the trackers keep updating on N+1, N+2, ...
+    # The frames seen in the meantime are fed to the worker, which forward-tracks the detections to the
+    # current frame with a tracker of its own, so the loop never replays them.
+    detector_worker = None
+    if args.async_detection:
+        detector_worker = DetectorWorker(lambda image: run_detection(image)[:, [1, 0, 3, 2]],
+            tracker = create_tracker(args.tracker, threads = args.tracker_threads))
+
+    # Logger
+    # One row per tracked object per frame, buffered and written every log_flush_rows rows or log_flush_seconds seconds
+    logger = None
+    if args.log:
+        logger = TrackLogger(stream_path('log.csv', index, len(args.input_path)), flushRows = args.log_flush_rows,
+            flushSeconds = args.log_flush_seconds, maxBytes = args.log_max_mb * 1024 * 1024)
+
+    # Tracks
+    # The tracked boxes of every frame, scaled back to the source video resolution for the MOT evaluation
+    tracks = None
+    if args.tracks is not None:
+        tracks = MOTWriter(stream_path(args.tracks, index, len(args.input_path)),
+            scale = frame_source.sourceWidth / 800.0 if frame_source.sourceWidth else 1.0)
+
+    # Short-term tracker
+    # Propagates the detected boxes between detections
+    trackers = create_tracker(args.tracker, threads = args.tracker_threads)
+
+    # Detection scheduler
+    # A fixed cadence of skip_frame frames, or an interval adapted to the number, confidence and speed of the tracks
+    if args.adaptive_detection:
+        tracker_confidence = args.tracker_confidence if args.tracker_confidence is not None else trackers.lostConfidence
+        scheduler = DetectionScheduler(minInterval = args.min_skip, maxInterval = args.max_skip, minConfidence = tracker_confidence,
+            minMotion = args.motion_area, regions = regions)
+    else:
+        scheduler = DetectionScheduler(minInterval = args.skip_frame, maxInterval = args.skip_frame)
+
+    # Motion gate
+    # Frames are compared with a low resolution background model, frames without motion skip detection and tracking
+    gate = MotionGate(threshold = args.motion_threshold, minArea = args.motion_area) if args.motion_gate else None
+
+    # Video writer
+    # Annotated frames are copied to a bounded queue and encoded on a background thread. When the queue is full
+    # the loop waits for the encoder, or drops the frame with --output_drop
+    writer = None
+    if args.output:
+        writer = VideoSink(stream_path(args.output, index, len(args.input_path)), fourcc = args.output_codec,
+            fps = args.output_fps or (frame_source.fps or 30) / max(args.output_every, 1), scale = args.output_scale,
+            every = args.output_every, queueSize = args.output_queue, dropFrames = args.output_drop, profiler = profiler)
+
+    name = 'object detection' if len(args.input_path) == 1 else 'object detection {}'.format(index)
+    stream = Stream(name, frame_source, counter, trackers,
+        output = stream_path(args.output, index, len(args.input_path)),
+        logger = logger,
+        worker = detector_worker,
+        scheduler = scheduler,
+        gate = gate,
+        profiler = profiler,
+        tracks = tracks,
+        writer = writer)
+    streams.append(stream)
+
+# Streams without a frame rate (e.g. some webcams) are throttled at 30 fps
+fps = min(s.source.fps or 30 for s in streams)
+
+# Start decoding while the models load, then wait for the models
+for stream in streams:
+    stream.source.start()
+
+models_warmed_up = model_loader.submit(warm_up_models, [s.source.shape for s in streams if s.source.shape is not None])
+models_loaded.result()
+models_warmed_up.result()
+model_loader.shutdown()
+profiler.reset()
+if gender_classifier is not None:
+    gender_classifier.reset()
+
+def track_boxes(trackers, rgb):
+    """
+    Function to propagate the tracked boxes to a frame, ignoring the objects that left the regions of interest.
 
-    status = 'waiting'
+    Args:
+        trackers -> short-term tracker of the stream.
+        rgb -> RGB frame as numpy array.
+    Returns:
+        rects -> list of (xmin, ymin, xmax, ymax) boxes of the frame.
+        centroCoordDict -> dict of centroid -> box of the frame.
+        confidences -> confidences of the short-term trackers.
+    """
     rects = []
     centroCoordDict = {}
 
-    # Expand dimensions since the model expects images to have shape: [1, None, None, 3]
-    image_np_expanded = np.expand_dims(image_np, axis=0)
+    with profiler.measure('tracking'):
+        boxes, confidences = trackers.update(rgb)
+    for (xmin, ymin, xmax, ymax) in boxes.tolist():
+        cX = int((xmin + xmax) / 2.0)
+        cY = int((ymin + ymax) / 2.0)
 
-    if framecount % int(args.skip_frame) == 0:
-        status = 'detecting'
-        trackers = []
+        # Ignore objects that left the regions of interest
+        if not in_regions(regions, cX, cY):
+            continue
+        centroCoordDict[(cX, cY)] = (xmin, ymin, xmax, ymax)
 
-        input_tensor = tf.convert_to_tensor(np.expand_dims(image_np, 0), dtype=tf.float32)
-        detections, predictions_dict, shapes = detect_fn(input_tensor)
+        rects.append((xmin, ymin, xmax, ymax))
 
-        label_id_offset = 1
+    return rects, centroCoordDict, confidences
 
-        boxes = detections['detection_boxes'][0].numpy()
-        classes = (detections['detection_classes'][0].numpy() + label_id_offset).astype(int)
-        scores = detections['detection_scores'][0].numpy()
+def process_frame(stream):
+    """
+    Function to track, count, annotate, write and log one frame of a stream.
 
-        # Remove all results that are not a member of [classes_to_detect] and has score lower than 50%
-        boxes, classes, scores = clean_detection_result(boxes, classes, scores, args.classes_to_detect, threshold = 0.5)
+    Args:
+        stream -> Stream whose current frame is processed. stream.detections holds the boxes
+            computed for this frame by a batched detection call, or None on tracking frames.
+    Returns:
+        image_np -> annotated BGR frame.
+    """
+    image_np, rgb = stream.image, stream.rgb
+    (H, W) = (stream.H, stream.W)
+    counter = stream.counter
+    detector_worker = stream.worker
+    framecount = stream.framecount
 
-        # Bounding boxes
-        for box in boxes:
-            box = box*np.array([H, W, H, W])
-            ymin, xmin, ymax, xmax = box.astype('int')
+    status = 'waiting'
+    rects = []
+    centroCoordDict = {}
+    confidences = []
 
-            cX = int((xmin + xmax) / 2.0)
-            cY = int((ymin + ymax) / 2.0)
-            
-            tracker = dlib.correlation_tracker()
-            rect = dlib.rectangle(xmin, ymin, xmax, ymax)
-            tracker.start_track(rgb, rect)
-
-            trackers.append(tracker)
-
-            g_image = image_np[ymin:ymax, xmin:xmax]
-            g_image = cv2.cvtColor(g_image, cv2.COLOR_BGR2GRAY)
-            g_image = g_image.astype('float')/255.0
-            g_image = np.expand_dims(g_image, axis = 0)
-            g_image = np.expand_dims(g_image, axis =-1)
-
-            if g_image is None:
-                gender = 'undetected'
-            else:
-                confidence = gender_model.predict(g_image)[0]
-                g_idx = np.argmax(confidence)
-                gender = g_classes[g_idx]
-
-            centroCoordDict[(cX, cY)] = (xmin, ymin, xmax, ymax, gender)
-    else:
-        for tracker in trackers:
-            status = 'tracking'
+    if not stream.moving:
+        # Nothing moved since the last frames, the objects keep their state
+        status = 'idle'
+
+    elif detector_worker is not None:
+        # The worker hands back its own tracker, started on the detections and already forward-tracked
+        # through the frames fed since the submission, in exchange for the stream's tracker
+        result = detector_worker.poll(stream.trackers)
 
-            tracker.update(rgb)
-            pos = tracker.get_position()
+        if result is not None:
+            status = 'detecting'
+            stream.trackers = result[2]
 
-            xmin = int(pos.left())
-            ymin = int(pos.top())
-            xmax = int(pos.right())
-            ymax = int(pos.bottom())
+        if len(stream.trackers) > 0 and result is None:
+            status = 'tracking'
+
+        rects, centroCoordDict, confidences = track_boxes(stream.trackers, rgb)
 
-            g_image = image_np[ymin:ymax, xmin:xmax]
-            g_image = cv2.cvtColor(g_image, cv2.COLOR_BGR2GRAY)
-            g_image = g_image.astype('float')/255.0
-            g_image = np.expand_dims(g_image, axis = 0)
-            g_image = np.expand_dims(g_image, axis =-1)
+        # Submit a new frame once the scheduler calls for a detection, the frames seen in the meantime
+        # are fed to the worker
+        if detector_worker.busy():
+            detector_worker.feed(rgb.copy())
+        elif stream.scheduler.due(framecount):
+            detector_worker.submit(framecount, image_np.copy(), rgb.copy())
+            stream.scheduler.detected(framecount)
 
-            if g_image is None:
-                gender = 'undetected'
-            else:
-                confidence = gender_model.predict(g_image)[0]
-                g_idx = np.argmax(confidence)
-                gender = g_classes[g_idx]
+    elif stream.detections is not None:
+        status = 'detecting'
 
+        # Bounding boxes
+        with profiler.measure('tracking'):
+            stream.trackers.start(rgb, stream.detections[:, [1, 0, 3, 2]])
+        for (ymin, xmin, ymax, xmax) in stream.detections.tolist():
             cX = int((xmin + xmax) / 2.0)
             cY = int((ymin + ymax) / 2.0)
-            centroCoordDict[(cX, cY)] = (xmin, ymin, xmax, ymax, gender)
 
-            rects.append((xmin, ymin, xmax, ymax))
-    
-    # use the centroid tracker to associate the old object centroids
-    # with the newly computer object centroids
-    objects = ct.update(rects)
+            centroCoordDict[(cX, cY)] = (xmin, ymin, xmax, ymax)
+    else:
+        if len(stream.trackers) > 0:
+            status = 'tracking'
 
-    # CSV Logger
-    log_track = []
+        rects, centroCoordDict, confidences = track_boxes(stream.trackers, rgb)
 
+    # Associate the boxes with the tracked objects, classify their gender and count them
+    # The gender classification time is recorded apart from the association
+    association_start = time.perf_counter()
+    gender_seconds = gender_classifier.seconds if gender_classifier is not None else 0.0
+    if stream.moving:
+        objects, log_track = counter.update(rects, centroCoordDict, image_np, gender_classifier)
+    else:
+        objects, log_track = counter.snapshot()
+    gate = stream.gate
+    stream.scheduler.observe(objects, confidences, motion = gate.motion if gate is not None else None,
+        mask = gate.mask if gate is not None else None, boxes = list(centroCoordDict.values()),
+        scale = gate.scale if gate is not None else 1.0)
+    gender_seconds = gender_classifier.seconds - gender_seconds if gender_classifier is not None else 0.0
+    if gender_seconds > 0:
+        profiler.add('gender', gender_seconds)
+    profiler.add('association', time.perf_counter() - association_start - gender_seconds)
+
+    drawing_start = time.perf_counter()
     for (objectID, centroid) in objects.items():
-        
-        # check to see if a trackable object exists for the current object ID
-        go = genderObjects.get(objectID, None)
-        to = trackableObjects.get(objectID, None)
-
-        if go is None:
-            # masukkan fungsi prediksi gender di sini
-            # dengan masukan frame dan bounding box
-            # yang bisa diakses dari dict centroid -> koordinat
-            if centroCoordDict[(centroid[0], centroid[1])][4] is not 'undetected':
-                go = GenderObject(objectID, centroCoordDict[(centroid[0], centroid[1])][4])
-                go.determine_gender()
-        elif len(go.genders) < 3:
-            # masukkan fungsi prediksi gender di sini
-            # dengan masukan frame dan bounding box
-            # yang bisa diakses dari dict centroid -> koordinat
-            if centroCoordDict[(centroid[0], centroid[1])][4] is not 'undetected':
-                go.genders.append(centroCoordDict[(centroid[0], centroid[1])][4])
-                go.determine_gender()
-
-        genderObjects[objectID] = go
-
-        if to is None:
-            to = TrackableObject(objectID, centroid)
-        else:
-            y = [c[1] for c in to.centroids]
-            direction = centroid[1] - y[0]
-            to.centroids.append(centroid)
-
-            if not to.counted:
-                if direction < -(H/5):
-                    totalUp += 1
-                    if go.gender == 'man':
-                        manUp += 1
-                    else:
-                        womanUp += 1
-                    to.counted = True
-                elif direction > H/5:
-                    totalDown += 1
-                    if go.gender == 'man':
-                        manDown += 1
-                    else:
-                        womanDown += 1
-                    to.counted = True
-        
-        trackableObjects[objectID] = to
-
-        log_track.append({'ID':objectID, 'location': centroid, 'gender': go.gender})
-
-        #CREATE TUPLE FOR LOG with format (ID, centroid, height, gender)
-
         #Centroid display
         text = "ID {}".format(objectID)
         image_np = cv2.putText(image_np, text, (centroid[0] - 10, centroid[1] - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
         image_np = cv2.circle(image_np, (centroid[0], centroid[1]), 4, (0, 255, 0), -1)
 
+    #Regions of interest display
+    for region in regions:
+        image_np = region.draw(image_np)
+
     #Counter display
     info = [
-        ("Up", totalUp),
-        ("Down", totalDown),
+        ("Up", counter.totalUp),
+        ("Down", counter.totalDown),
         ("Status", status),
     ]
 
     infoGender = [
-        (manUp, womanUp),
-        (manDown, womanDown)
+        (counter.manUp, counter.womanUp),
+        (counter.manDown, counter.womanDown)
     ]
 
     for (i, (k, v)) in enumerate(info):
@@ -374,39 +561,85 @@ while True:
             text = "{}: {}".format(k, v)
         image_np = cv2.putText(image_np, text, (10, H - ((i * 20) + 20)),
             cv2.FONT_HERSHEY_SIMPLEX, 0.3, (0, 0, 255), 1)
+    profiler.add('drawing', time.perf_counter() - drawing_start)
     
-    if writer is not None:
-        writer.write(image_np)
-    
-    # Timestamp
-    timeDiff = time.time() - start_time
-    print('------ {:f} seconds ------'.format(timeDiff))
-    if (timeDiff < 1.0/(fps)): time.sleep(1.0/(fps) - timeDiff)
+    if stream.writer is not None:
+        with profiler.measure('write'):
+            stream.writer.write(image_np)
 
     # Logger 
-    if args.log:
-        log_time = datetime.datetime.now().strftime("%H:%M:%S")
-        log_vidtime = datetime.timedelta(seconds = framecount/fps)
+    if stream.logger is not None:
+        with profiler.measure('logging'):
+            stream.logger.log(framecount, framecount/(stream.source.fps or fps), log_track, counter)
 
-        log_fields = [log_time, log_vidtime, log_track, totalUp, manUp, womanUp, totalDown, manDown, womanDown]
+    # Tracked boxes, for the objects with a box on this frame
+    if stream.tracks is not None:
+        with profiler.measure('logging'):
+            stream.tracks.write(framecount, {objectID: centroCoordDict[(centroid[0], centroid[1])]
+                for (objectID, centroid) in objects.items() if (centroid[0], centroid[1]) in centroCoordDict})
 
-        with open('log.csv', 'a') as f:
-            log_writer = csv.writer(f)
-            log_writer.writerow(log_fields)
-
-    # Display output
-    cv2.imshow('object detection', image_np)
     # Frame count update
-    framecount += 1
+    stream.framecount += 1
 
-    if cv2.waitKey(25) & 0xFF == ord('q'):
-        cv2.destroyAllWindows()
+    return image_np
+
+processed_frames = 0
+run_start = time.time()
+
+# Detection
+while True:
+    #Initialize start time to count time elapsed for each frame.
+    start_time = time.time()
+
+    # Read one frame from every camera, streams stop at their end of stream
+    active = [stream for stream in streams if not stream.ended and (args.max_frames == 0 or stream.framecount < args.max_frames)
+        and stream.read() is not None]
+    if len(active) == 0:
         break
 
-if writer is not None:
-    writer.release()
+    # Frames of all streams due for detection go through the detector in one batched call
+    due = [stream for stream in active if stream.worker is None and stream.moving and stream.scheduler.due(stream.framecount)]
+    if len(due) > 0:
+        for (stream, boxes) in zip(due, run_detection_frames([stream.image for stream in due])):
+            stream.detections = boxes
+            stream.scheduler.detected(stream.framecount)
+
+    for stream in active:
+        image_np = process_frame(stream)
+
+        # Display output
+        if not args.headless:
+            cv2.imshow(stream.name, image_np)
+
+    if processed_frames == 0:
+        print('[INFO] time to first processed frame: {:.2f} seconds'.format(time.time() - startup_time))
+    processed_frames += len(active)
+
+    # Timestamp
+    # Only live cameras are throttled to their frame rate, recorded footage is processed as fast as possible
+    timeDiff = time.time() - start_time
+    profiler.add('frame', timeDiff)
+    if profiler.due():
+        print('[INFO] stage latencies\n{}'.format(profiler.summary()))
+    if live_input and (timeDiff < 1.0/(fps)): time.sleep(1.0/(fps) - timeDiff)
+
+    if not args.headless and cv2.waitKey(1) & 0xFF == ord('q'):
+        cv2.destroyAllWindows()
+        break
 
-if args.input_path == '0' or args.input_path == 'webcam':
-    cap.stop() 
-else:
-    cap.release()
\ No newline at end of file
+run_time = time.time() - run_start
+print('[INFO] processed {} frames in {:.2f} seconds ({:.2f} fps)'.format(processed_frames, run_time, processed_frames / max(run_time, 1e-9)))
+
+print('[INFO] stage latencies\n{}'.format(profiler.summary()))
+if gender_classifier is not None:
+    print('[INFO] gender inferences: {}, skipped: {}'.format(gender_classifier.inferences, gender_classifier.skipped))
+
+for stream in streams:
+    counter = stream.counter
+    print('[INFO] {}: up {} (female {}, male {}), down {} (female {}, male {})'.format(stream.name, counter.totalUp,
+        counter.womanUp, counter.manUp, counter.totalDown, counter.womanDown, counter.manDown))
+    if stream.gate is not None:
+        print('[INFO] {}: {} of {} frames gated out ({:.1%})'.format(stream.name, stream.gate.gated, stream.gate.frames, stream.gate.gated_fraction()))
+    if stream.writer is not None and stream.writer.dropped > 0:
+        print('[INFO] {}: {} frames dropped by the video writer'.format(stream.name, stream.writer.dropped))
+    stream.close()
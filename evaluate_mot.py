@@ -0,0 +1,30 @@
+# Multiple object tracking evaluation
+# Compares the tracks written by detection_video.py --tracks with MOTChallenge-style ground truth
+# (frame, id, left, top, width, height, ...) and reports MOTA, MOTP (mean IoU of the matches), IDF1,
+# identity switches and count errors. The boxes are matched frame by frame with vectorized IoU.
+#
+# python detection_video.py -i videos/clip.avi --headless --tracks tracks.txt
+# python evaluate_mot.py -g gt.txt -t tracks.txt
+
+import argparse
+import json
+
+from functions.motevaluation import read_mot, evaluate
+
+parser = argparse.ArgumentParser()
+
+parser.add_argument('-g', '--ground_truth', required = True, help = 'path of the ground truth tracks')
+parser.add_argument('-t', '--tracks', required = True, help = 'path of the tracks written by detection_video.py --tracks')
+parser.add_argument('--iou_threshold', default = 0.5, type = float, help = 'minimum IoU between a ground truth and a tracked box to be matched')
+parser.add_argument('-o', '--output', default = None, help = 'optional path of a JSON file the metrics are written to')
+
+args = parser.parse_args()
+
+metrics = evaluate(read_mot(args.ground_truth, groundTruth = True), read_mot(args.tracks), iouThreshold = args.iou_threshold)
+
+for (name, value) in metrics.items():
+    print('{:>16}: {}'.format(name, round(value, 4) if isinstance(value, float) else value))
+
+if args.output is not None:
+    with open(args.output, 'w') as f:
+        json.dump(metrics, f, indent = 2)
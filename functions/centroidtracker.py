@@ -1,17 +1,21 @@
 # import the necessary packages
 from scipy.spatial import distance as dist
-from collections import OrderedDict
+from scipy.optimize import linear_sum_assignment
 import numpy as np
-
-class CentroidTracker:
-	def __init__(self, maxDisappeared=50, maxDistance=50):
-		# initialize the next unique object ID along with two ordered
-		# dictionaries used to keep track of mapping a given object
-		# ID to its centroid and number of consecutive frames it has
-		# been marked as "disappeared", respectively
-		self.nextObjectID = 0
-		self.objects = OrderedDict()
-		self.disappeared = OrderedDict()
+from functions.objecttracker import ObjectTracker
+
+class CentroidTracker(ObjectTracker):
+	def __init__(self, maxDisappeared=50, maxDistance=50, capacity=64):
+		# initialize the object IDs and their callbacks along with three
+		# preallocated arrays used to keep track of the object IDs,
+		# their centroids and the number of consecutive frames they
+		# have been marked as "disappeared" -- only the first `count`
+		# rows of the arrays hold live objects
+		ObjectTracker.__init__(self)
+		self.ids = np.zeros(capacity, dtype="int64")
+		self.centroids = np.zeros((capacity, 2), dtype="int")
+		self.missing = np.zeros(capacity, dtype="int")
+		self.count = 0
 
 		# store the number of maximum consecutive frames a given
 		# object is allowed to be marked as "disappeared" until we
@@ -23,141 +27,102 @@ class CentroidTracker:
 		# distance we'll start to mark the object as "disappeared"
 		self.maxDistance = maxDistance
 
-	def register(self, centroid):
-		# when registering an object we use the next available object
-		# ID to store the centroid
-		self.objects[self.nextObjectID] = centroid
-		self.disappeared[self.nextObjectID] = 0
-		self.nextObjectID += 1
-
-	def deregister(self, objectID):
-		# to deregister an object ID we delete the object ID from
-		# both of our respective dictionaries
-		del self.objects[objectID]
-		del self.disappeared[objectID]
+	def register(self, centroids):
+		# when registering objects we use the next available object
+		# IDs (or the IDs of the recovered objects) to store the
+		# centroids
+		centroids = np.asarray(centroids, dtype="int").reshape(-1, 2)
+		end = self.count + len(centroids)
+
+		# grow the arrays (doubling their capacity) if they are full
+		if end > len(self.ids):
+			capacity = max(end, 2 * len(self.ids))
+			self.ids = np.resize(self.ids, capacity)
+			self.centroids = np.resize(self.centroids, (capacity, 2))
+			self.missing = np.resize(self.missing, capacity)
+
+		self.ids[self.count:end] = self.next_ids(centroids)
+		self.centroids[self.count:end] = centroids
+		self.missing[self.count:end] = 0
+
+		self.notify(self.registerCallbacks, self.ids[self.count:end],
+			self.centroids[self.count:end])
+
+		self.count = end
+
+	def deregister(self, objectIDs):
+		# to deregister object IDs we compact the live rows of the
+		# arrays, keeping the remaining objects in registration order
+		keep = ~np.isin(self.ids[:self.count], objectIDs)
+		end = int(keep.sum())
+
+		self.notify(self.deregisterCallbacks, self.ids[:self.count][~keep],
+			self.centroids[:self.count][~keep])
+
+		self.ids[:end] = self.ids[:self.count][keep]
+		self.centroids[:end] = self.centroids[:self.count][keep]
+		self.missing[:end] = self.missing[:self.count][keep]
+		self.count = end
+
+	def expire(self):
+		# deregister every object that has been marked as missing for
+		# more than the maximum number of consecutive frames
+		expired = self.missing[:self.count] > self.maxDisappeared
+		if expired.any():
+			self.deregister(self.ids[:self.count][expired])
 
 	def update(self, rects):
 		# check to see if the list of input bounding box rectangles
 		# is empty
 		if len(rects) == 0:
-			# loop over any existing tracked objects and mark them
-			# as disappeared
-			for objectID in list(self.disappeared.keys()):
-				self.disappeared[objectID] += 1
-
-				# if we have reached a maximum number of consecutive
-				# frames where a given object has been marked as
-				# missing, deregister it
-				if self.disappeared[objectID] > self.maxDisappeared:
-					self.deregister(objectID)
+			# mark all existing tracked objects as disappeared and
+			# deregister the ones missing for too long
+			self.missing[:self.count] += 1
+			self.expire()
 
 			# return early as there are no centroids or tracking info
 			# to update
 			return self.objects
 
-		# initialize an array of input centroids for the current frame
-		inputCentroids = np.zeros((len(rects), 2), dtype="int")
-
-		# loop over the bounding box rectangles
-		for (i, (startX, startY, endX, endY)) in enumerate(rects):
-			# use the bounding box coordinates to derive the centroid
-			cX = int((startX + endX) / 2.0)
-			cY = int((startY + endY) / 2.0)
-			inputCentroids[i] = (cX, cY)
+		# use the bounding box coordinates to derive the centroids of
+		# the current frame
+		rects = np.asarray(rects).reshape(-1, 4)
+		inputCentroids = ((rects[:, :2] + rects[:, 2:]) / 2.0).astype("int")
 
 		# if we are currently not tracking any objects take the input
 		# centroids and register each of them
-		if len(self.objects) == 0:
-			for i in range(0, len(inputCentroids)):
-				self.register(inputCentroids[i])
+		if self.count == 0:
+			self.register(inputCentroids)
+			return self.objects
 
-		# otherwise, are are currently tracking objects so we need to
-		# try to match the input centroids to existing object
-		# centroids
-		else:
-			# grab the set of object IDs and corresponding centroids
-			objectIDs = list(self.objects.keys())
-			objectCentroids = list(self.objects.values())
-
-			# compute the distance between each pair of object
-			# centroids and input centroids, respectively -- our
-			# goal will be to match an input centroid to an existing
-			# object centroid
-			D = dist.cdist(np.array(objectCentroids), inputCentroids)
-
-			# in order to perform this matching we must (1) find the
-			# smallest value in each row and then (2) sort the row
-			# indexes based on their minimum values so that the row
-			# with the smallest value as at the *front* of the index
-			# list
-			rows = D.min(axis=1).argsort()
-
-			# next, we perform a similar process on the columns by
-			# finding the smallest value in each column and then
-			# sorting using the previously computed row index list
-			cols = D.argmin(axis=1)[rows]
-
-			# in order to determine if we need to update, register,
-			# or deregister an object we need to keep track of which
-			# of the rows and column indexes we have already examined
-			usedRows = set()
-			usedCols = set()
-
-			# loop over the combination of the (row, column) index
-			# tuples
-			for (row, col) in zip(rows, cols):
-				# if we have already examined either the row or
-				# column value before, ignore it
-				if row in usedRows or col in usedCols:
-					continue
-
-				# if the distance between centroids is greater than
-				# the maximum distance, do not associate the two
-				# centroids to the same object
-				if D[row, col] > self.maxDistance:
-					continue
-
-				# otherwise, grab the object ID for the current row,
-				# set its new centroid, and reset the disappeared
-				# counter
-				objectID = objectIDs[row]
-				self.objects[objectID] = inputCentroids[col]
-				self.disappeared[objectID] = 0
-
-				# indicate that we have examined each of the row and
-				# column indexes, respectively
-				usedRows.add(row)
-				usedCols.add(col)
-
-			# compute both the row and column index we have NOT yet
-			# examined
-			unusedRows = set(range(0, D.shape[0])).difference(usedRows)
-			unusedCols = set(range(0, D.shape[1])).difference(usedCols)
-
-			# in the event that the number of object centroids is
-			# equal or greater than the number of input centroids
-			# we need to check and see if some of these objects have
-			# potentially disappeared
-			if D.shape[0] >= D.shape[1]:
-				# loop over the unused row indexes
-				for row in unusedRows:
-					# grab the object ID for the corresponding row
-					# index and increment the disappeared counter
-					objectID = objectIDs[row]
-					self.disappeared[objectID] += 1
-
-					# check to see if the number of consecutive
-					# frames the object has been marked "disappeared"
-					# for warrants deregistering the object
-					if self.disappeared[objectID] > self.maxDisappeared:
-						self.deregister(objectID)
-
-			# otherwise, if the number of input centroids is greater
-			# than the number of existing object centroids we need to
-			# register each new input centroid as a trackable object
-			else:
-				for col in unusedCols:
-					self.register(inputCentroids[col])
+		# compute the distance between each pair of object centroids
+		# and input centroids, pairs further apart than the maximum
+		# distance are gated out with a prohibitive cost
+		D = dist.cdist(self.centroids[:self.count], inputCentroids)
+		gated = D > self.maxDistance
+		cost = np.where(gated, 1e9, D)
+
+		# find the assignment of input centroids to objects with the
+		# minimum total distance and drop the gated pairs
+		(rows, cols) = linear_sum_assignment(cost)
+		valid = ~gated[rows, cols]
+		(rows, cols) = (rows[valid], cols[valid])
+
+		# update the centroids of the matched objects and reset their
+		# disappeared counters
+		self.centroids[rows] = inputCentroids[cols]
+		self.missing[rows] = 0
+
+		# every unmatched object is marked as disappeared and every
+		# unmatched input centroid is registered as a new object
+		unusedRows = np.ones(self.count, dtype=bool)
+		unusedRows[rows] = False
+		unusedCols = np.ones(len(inputCentroids), dtype=bool)
+		unusedCols[cols] = False
+
+		self.missing[:self.count][unusedRows] += 1
+		self.expire()
+		self.register(inputCentroids[unusedCols])
 
 		# return the set of trackable objects
-		return self.objects
\ No newline at end of file
+		return self.objects
@@ -0,0 +1,45 @@
+# import the necessary packages
+import numpy as np
+
+class DetectionFilter:
+	def __init__(self, category_index, classes_to_detect, threshold=0.5,
+		classThresholds=None, topK=None):
+		# build a lookup table mapping every class ID of the label map
+		# to its minimum score -- classes that are not detected get an
+		# infinite threshold, and so does the extra last entry that
+		# catches class IDs outside the label map
+		classThresholds = classThresholds or {}
+		maxID = max(category_index.keys())
+		self.thresholds = np.full(maxID + 2, np.inf, dtype="float32")
+		for (classID, category) in category_index.items():
+			name = category['name']
+			if name in classes_to_detect:
+				self.thresholds[classID] = classThresholds.get(name, threshold)
+
+		# boolean mask of the class IDs to detect
+		self.mask = np.isfinite(self.thresholds)
+
+		# store the maximum number of detections kept per frame
+		self.topK = topK
+
+	def filter(self, boxes, classes, scores):
+		"""
+		Remove all detections that are not included in classes_to_detect or
+		whose score is not above the threshold of their class.
+
+		Args:
+			boxes, classes, scores -> detection from TF2 Object Detection Model.
+		Returns:
+			boxes, classes, scores -> numpy arrays of the kept detections,
+			at most topK of them, sorted by decreasing score.
+		"""
+		lookup = np.clip(classes, 0, len(self.thresholds) - 1)
+		keep = np.flatnonzero(scores > self.thresholds[lookup])
+
+		# sort the kept detections by decreasing score and keep the
+		# topK highest scores
+		keep = keep[np.argsort(-scores[keep], kind="stable")]
+		if self.topK is not None:
+			keep = keep[:self.topK]
+
+		return boxes[keep], classes[keep], scores[keep]
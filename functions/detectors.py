@@ -0,0 +1,211 @@
+# import the necessary packages
+import tensorflow as tf
+import numpy as np
+import hashlib
+import shutil
+import glob
+import cv2
+import os
+
+class CheckpointDetector:
+	def __init__(self, configPath, checkpointPath):
+		# the research tree (model builder and protos) is only needed to
+		# rebuild the model from its pipeline config and checkpoint
+		from object_detection.builders import model_builder
+		from functions import config_util
+
+		configs = config_util.get_configs_from_pipeline_file(configPath)
+		self.model = model_builder.build(model_config=configs['model'],
+			is_training=False)
+
+		ckpt = tf.compat.v2.train.Checkpoint(model=self.model)
+		ckpt.restore(checkpointPath).expect_partial()
+
+	@tf.function
+	def detect_fn(self, image):
+		"""Detect objects in image."""
+		# the frames are sent as uint8 and cast on the device
+		image = tf.cast(image, tf.float32)
+		image, shapes = self.model.preprocess(image)
+		prediction_dict = self.model.predict(image, shapes)
+		return self.model.postprocess(prediction_dict, shapes)
+
+	def detect(self, images):
+		"""
+		Run the detector on a batch of frames.
+
+		Args:
+			images -> uint8 numpy array of shape [N, H, W, 3].
+		Returns:
+			boxes -> [N, K, 4] normalized (ymin, xmin, ymax, xmax) boxes.
+			classes -> [N, K] label map class IDs.
+			scores -> [N, K] scores.
+		"""
+		detections = self.detect_fn(tf.convert_to_tensor(images, dtype=tf.uint8))
+
+		label_id_offset = 1
+
+		return (detections['detection_boxes'].numpy(),
+			(detections['detection_classes'].numpy() + label_id_offset).astype(int),
+			detections['detection_scores'].numpy())
+
+class SavedModelDetector:
+	def __init__(self, path):
+		# load a model exported by object_detection/exporter_lib_v2.py
+		# with the image_tensor input type (DetectionFromImageModule),
+		# it takes uint8 frames and needs neither the model builder nor
+		# the protos
+		self.model = tf.saved_model.load(path)
+
+	def detect(self, images):
+		"""
+		Run the detector on a batch of frames.
+
+		Args:
+			images -> uint8 numpy array of shape [N, H, W, 3].
+		Returns:
+			boxes -> [N, K, 4] normalized (ymin, xmin, ymax, xmax) boxes.
+			classes -> [N, K] label map class IDs.
+			scores -> [N, K] scores.
+		"""
+		boxes = []
+		classes = []
+		scores = []
+
+		# the exported signature takes one frame at a time, the class
+		# IDs already include the label ID offset
+		for image in images:
+			detections = self.model(tf.convert_to_tensor(image[None], dtype=tf.uint8))
+			boxes.append(detections['detection_boxes'][0].numpy())
+			classes.append(detections['detection_classes'][0].numpy().astype(int))
+			scores.append(detections['detection_scores'][0].numpy())
+
+		return np.stack(boxes), np.stack(classes), np.stack(scores)
+
+def checkpoint_hash(checkpointPath):
+	# hash the (small) index file of the checkpoint along with the name,
+	# size and modification time of its data files, so a cached graph
+	# is never used with other weights without reading the hundreds of
+	# MB of weights on every launch
+	sha = hashlib.sha1()
+	for path in sorted(glob.glob(checkpointPath + '.*')):
+		if path.endswith('.index'):
+			with open(path, 'rb') as f:
+				sha.update(f.read())
+		else:
+			stat = os.stat(path)
+			sha.update('{} {} {}'.format(os.path.basename(path), stat.st_size,
+				stat.st_mtime_ns).encode())
+	return sha.hexdigest()[:12]
+
+class TracedDetectionModule(tf.Module):
+	def __init__(self, model, shape):
+		# trace the detector for uint8 batches of a single frame shape,
+		# the batch size stays free
+		self.model = model
+		self.detect = tf.function(self._detect, input_signature=[
+			tf.TensorSpec(shape=[None, shape[0], shape[1], 3], dtype=tf.uint8)])
+
+	def _detect(self, image):
+		label_id_offset = 1
+
+		image = tf.cast(image, tf.float32)
+		image, shapes = self.model.preprocess(image)
+		prediction_dict = self.model.predict(image, shapes)
+		detections = self.model.postprocess(prediction_dict, shapes)
+
+		return {'detection_boxes': detections['detection_boxes'],
+			'detection_classes': tf.cast(detections['detection_classes'], tf.int32) + label_id_offset,
+			'detection_scores': detections['detection_scores']}
+
+class CachedDetector:
+	def __init__(self, name, configPath, checkpointPath, cacheDir='models/cache'):
+		# the traced graph is cached under cacheDir as a saved_model
+		# keyed by the model name, the checkpoint hash and the input
+		# shape, the shape is pinned by the first call to detect()
+		self.name = name
+		self.configPath = configPath
+		self.checkpointPath = checkpointPath
+		self.cacheDir = cacheDir
+		self.checkpointHash = checkpoint_hash(checkpointPath)
+		self.shape = None
+		self.model = None
+		self.cached = False
+
+	def cache_path(self, shape):
+		return os.path.join(self.cacheDir, '{}_{}_{}x{}'.format(self.name,
+			self.checkpointHash, shape[0], shape[1]))
+
+	def export(self, path, shape):
+		# rebuild the model from its checkpoint, trace it for the shape
+		# and save it, the saved_model is written next to its final
+		# path and moved in place so an interrupted export is not used
+		from object_detection.builders import model_builder
+		from functions import config_util
+
+		configs = config_util.get_configs_from_pipeline_file(self.configPath)
+		model = model_builder.build(model_config=configs['model'],
+			is_training=False)
+		ckpt = tf.compat.v2.train.Checkpoint(model=model)
+		ckpt.restore(self.checkpointPath).expect_partial()
+
+		module = TracedDetectionModule(model, shape)
+		module.detect.get_concrete_function()
+
+		tmpPath = path + '.tmp'
+		shutil.rmtree(tmpPath, ignore_errors=True)
+		tf.saved_model.save(module, tmpPath)
+		os.replace(tmpPath, path)
+
+	def pin(self, shape):
+		"""
+		Load the traced detector for a frame shape, tracing and caching
+		it first if needed. Every later batch is fed at this shape.
+
+		Args:
+			shape -> (height, width) of the frames.
+		"""
+		self.shape = (int(shape[0]), int(shape[1]))
+		path = self.cache_path(self.shape)
+		self.cached = os.path.isdir(path)
+		if not self.cached:
+			self.export(path, self.shape)
+		self.model = tf.saved_model.load(path)
+
+	def detect(self, images):
+		"""
+		Run the detector on a batch of frames. Frames of another size than
+		the pinned shape are scaled down to fit if needed and zero-padded,
+		so a resolution change never retraces the graph.
+
+		Args:
+			images -> uint8 numpy array of shape [N, H, W, 3].
+		Returns:
+			boxes -> [N, K, 4] normalized (ymin, xmin, ymax, xmax) boxes.
+			classes -> [N, K] label map class IDs.
+			scores -> [N, K] scores.
+		"""
+		(h, w) = images.shape[1:3]
+		if self.model is None:
+			self.pin((h, w))
+
+		(H, W) = self.shape
+		scale = min(1.0, H / float(h), W / float(w))
+		(sh, sw) = (min(H, int(round(h * scale))), min(W, int(round(w * scale))))
+
+		batch = images
+		if (h, w) != (H, W):
+			batch = np.zeros((len(images), H, W, 3), dtype=np.uint8)
+			for (i, image) in enumerate(images):
+				if scale < 1.0:
+					image = cv2.resize(image, (sw, sh), interpolation=cv2.INTER_AREA)
+				batch[i, :sh, :sw] = image
+
+		detections = self.model.detect(tf.convert_to_tensor(batch, dtype=tf.uint8))
+
+		# map the boxes from the padded frame back to the frame
+		boxes = detections['detection_boxes'].numpy() * np.array([H / float(sh),
+			W / float(sw), H / float(sh), W / float(sw)])
+
+		return (boxes, detections['detection_classes'].numpy().astype(int),
+			detections['detection_scores'].numpy())
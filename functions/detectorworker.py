@@ -0,0 +1,160 @@
+# import the necessary packages
+from collections import deque
+from queue import Queue
+from threading import Thread, Condition
+
+class DetectorWorker:
+	def __init__(self, detectFn, tracker=None, maxBacklog=2):
+		# store the detection function, it takes a frame and returns
+		# the (xmin, ymin, xmax, ymax) boxes detected in that frame
+		self.detectFn = detectFn
+
+		# spare short-term tracker of the worker: once the detections
+		# are ready it is started on the submitted frame and
+		# forward-tracked through the frames fed since then, so the
+		# boxes handed back are aligned to the latest frame and the main
+		# thread never replays the frames seen during detection. The
+		# worker skips every other frame while it trails the caller by
+		# more than maxBacklog frames, and hands its tracker over once
+		# it is within maxBacklog frames, the caller replays those few
+		self.tracker = tracker
+		self.maxBacklog = maxBacklog
+
+		# one frame in flight at a time: the inbox holds the frame
+		# submitted for detection, the frames seen since then are fed
+		# to the worker until its result is polled
+		self.inbox = Queue(maxsize=1)
+		self.frames = deque()
+		self.cond = Condition()
+		self.pending = False
+		self.frameID = None
+		self.boxes = None
+		self.error = None
+		self.detected = False
+		self.caughtUp = False
+		self.stopped = False
+
+		self.thread = Thread(target=self._run, daemon=True)
+		self.thread.start()
+
+	def _run(self):
+		while True:
+			item = self.inbox.get()
+
+			# a None item is the signal to stop the worker
+			if item is None:
+				break
+
+			(frameID, image, rgb) = item
+			try:
+				boxes = self.detectFn(image)
+				if self.tracker is not None:
+					self.tracker.start(rgb, boxes)
+				error = None
+			except Exception as e:
+				# hand the error to the main thread, it is raised
+				# again when the result is polled
+				(boxes, error) = (None, e)
+
+			with self.cond:
+				(self.frameID, self.boxes, self.error) = (frameID, boxes, error)
+				self.detected = True
+				self.cond.notify_all()
+
+			# forward-track the detections through the frames fed since
+			# the submission until the worker is within maxBacklog frames
+			# of the caller
+			while error is None and self.tracker is not None:
+				with self.cond:
+					if len(self.frames) <= self.maxBacklog or self.stopped:
+						self.caughtUp = True
+						self.cond.notify_all()
+						break
+					if len(self.frames) > self.maxBacklog + 1:
+						self.frames.popleft()
+					frame = self.frames.popleft()
+
+				try:
+					self.tracker.update(frame)
+				except Exception as e:
+					with self.cond:
+						self.error = e
+						self.caughtUp = True
+					break
+
+	def busy(self):
+		# check to see if a frame is still waiting for its detections
+		return self.pending
+
+	def submit(self, frameID, image, rgb=None):
+		# only submit a frame if the worker is idle, the caller keeps
+		# tracking in the meantime
+		if self.pending:
+			return False
+
+		with self.cond:
+			self.pending = True
+			self.detected = False
+			self.caughtUp = False
+			self.frames.clear()
+		self.inbox.put((frameID, image, rgb))
+		return True
+
+	def feed(self, rgb):
+		# queue a frame seen while the detection is pending, for the
+		# worker to forward-track the detections through it
+		with self.cond:
+			if self.pending and self.tracker is not None:
+				self.frames.append(rgb)
+				self.cond.notify_all()
+
+	def poll(self, tracker=None):
+		"""
+		Non-blocking check for the result of the submitted frame.
+
+		Args:
+			tracker -> short-term tracker of the caller, swapped with the
+				tracker of the worker when the result is ready.
+		Returns:
+			(frameID, boxes, tracker) with the submitted frame ID, the
+			detected boxes and the worker's tracker following them up
+			to the last fed frame (None without tracker), or None when
+			the result is not ready yet or the worker is still
+			forward-tracking it.
+		"""
+		with self.cond:
+			if not self.detected:
+				return None
+			if self.error is None and self.tracker is not None and not self.caughtUp:
+				return None
+
+			self.pending = False
+			self.detected = False
+			backlog = list(self.frames)
+			self.frames.clear()
+			self.cond.notify_all()
+
+			if self.error is not None:
+				raise self.error
+
+			# the caller's tracker becomes the spare of the worker
+			ready = self.tracker
+			if tracker is not None:
+				self.tracker = tracker
+
+		# forward-track the few frames the worker has not reached yet
+		if ready is not None:
+			for frame in backlog:
+				ready.update(frame)
+		return (self.frameID, self.boxes, ready)
+
+	def stop(self):
+		# signal the worker to stop and wait for it to finish
+		with self.cond:
+			self.stopped = True
+			self.cond.notify_all()
+		self.inbox.put(None)
+		self.thread.join()
+
+		if self.tracker is not None:
+			self.tracker.close()
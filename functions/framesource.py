@@ -0,0 +1,146 @@
+# import the necessary packages
+from collections import deque
+from threading import Thread, Condition
+import time
+import cv2
+
+class FrameSource:
+	def __init__(self, src, width=800, queueSize=4, dropFrames=False, profiler=None):
+		# open the video stream and store the width every frame is
+		# resized to
+		self.cap = cv2.VideoCapture(src)
+		self.fps = self.cap.get(cv2.CAP_PROP_FPS)
+		self.width = width
+
+		# expected shape of the resized frames, from the properties of
+		# the stream (None when the stream does not report its size),
+		# and the width of the source frames
+		w = self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)
+		h = self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)
+		self.shape = (int(h * width / w), width, 3) if w > 0 and h > 0 else None
+		self.sourceWidth = w if w > 0 else None
+
+		# when the ring is full a file source waits for the consumer
+		# (backpressure), a live source drops the oldest ready frame so
+		# the consumer always gets the freshest one
+		self.dropFrames = dropFrames
+		self.dropped = 0
+
+		# ring of preallocated (BGR, RGB) buffers, allocated once the
+		# size of the first frame is known, along with the indexes of
+		# the free slots, the slots ready to be consumed and the slot
+		# currently held by the consumer
+		self.queueSize = queueSize
+		self.buffers = None
+		self.free = deque(range(queueSize))
+		self.ready = deque()
+		self.current = None
+
+		# optional StageProfiler timing the decoding and the resizing
+		self.profiler = profiler
+
+		self.cond = Condition()
+		self.stopped = False
+		self.ended = False
+		self.thread = None
+
+	def start(self):
+		# start the thread that decodes frames from the video stream
+		self.thread = Thread(target=self._run, daemon=True)
+		self.thread.start()
+		return self
+
+	def _allocate(self, frame):
+		# compute the target size the same way imutils.resize does and
+		# preallocate every buffer of the ring
+		(h, w) = frame.shape[:2]
+		self.size = (self.width, int(h * self.width / float(w)))
+		self.buffers = []
+		for _ in range(self.queueSize):
+			bgr = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+			rgb = cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB)
+			self.buffers.append((bgr, rgb))
+
+	def _acquire(self):
+		# grab a free slot, waiting for the consumer if needed
+		with self.cond:
+			while len(self.free) == 0 and not self.stopped:
+				if self.dropFrames and len(self.ready) > 0:
+					self.dropped += 1
+					return self.ready.popleft()
+				self.cond.wait()
+
+			if self.stopped:
+				return None
+			return self.free.popleft()
+
+	def _run(self):
+		frame = None
+		while not self.stopped:
+			# decode the next frame, reusing the decode buffer
+			start = time.perf_counter()
+			(ret, frame) = self.cap.read(frame)
+			if not ret or frame is None:
+				break
+			if self.profiler is not None:
+				self.profiler.add('decode', time.perf_counter() - start)
+
+			if self.buffers is None:
+				self._allocate(frame)
+
+			slot = self._acquire()
+			if slot is None:
+				break
+
+			# resize and colour-convert straight into the slot buffers
+			(bgr, rgb) = self.buffers[slot]
+			start = time.perf_counter()
+			cv2.resize(frame, self.size, dst=bgr, interpolation=cv2.INTER_AREA)
+			cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB, dst=rgb)
+			if self.profiler is not None:
+				self.profiler.add('resize', time.perf_counter() - start)
+
+			with self.cond:
+				self.ready.append(slot)
+				self.cond.notify_all()
+
+		# mark the end of the stream so the consumer stops waiting
+		with self.cond:
+			self.ended = True
+			self.cond.notify_all()
+
+	def read(self):
+		"""
+		Pop the next decoded frame. The buffers stay valid until the next
+		call to read().
+
+		Returns:
+			(bgr, rgb) -> numpy arrays of the resized frame, or (None, None)
+			once the stream has ended.
+		"""
+		with self.cond:
+			# hand the previous slot back to the decoding thread
+			if self.current is not None:
+				self.free.append(self.current)
+				self.current = None
+				self.cond.notify_all()
+
+			while len(self.ready) == 0 and not self.ended and not self.stopped:
+				self.cond.wait()
+
+			if len(self.ready) == 0:
+				return (None, None)
+
+			self.current = self.ready.popleft()
+			return self.buffers[self.current]
+
+	def stop(self):
+		# signal the thread to stop, wait for it and release the stream
+		with self.cond:
+			self.stopped = True
+			self.cond.notify_all()
+
+		if self.thread is not None:
+			self.thread.join()
+
+		self.cap.release()
@@ -0,0 +1,177 @@
+# import the necessary packages
+import numpy as np
+import time
+import cv2
+
+class TFLiteModel:
+	def __init__(self, path, threads=1):
+		# load a classifier converted to TFLite, e.g. the int8 model
+		# written by quantize_models.py, the standalone TFLite runtime
+		# is used when it is installed, so TensorFlow is not needed
+		from functions.tflitedetector import load_interpreter
+		self.interpreter = load_interpreter(path, threads)
+		inputDetails = self.interpreter.get_input_details()[0]
+		self.inputIndex = inputDetails['index']
+		self.outputIndex = self.interpreter.get_output_details()[0]['index']
+
+		# same attribute as keras models, the free dimensions of the
+		# converted model are -1 in its shape signature (its shape then
+		# holds placeholder sizes of 1), the batch size is always free
+		signature = inputDetails.get('shape_signature', inputDetails['shape'])
+		self.input_shape = (None,) + tuple(int(d) if d > 0 else None for d in signature[1:])
+		self.shape = tuple(inputDetails['shape'])
+
+	def predict(self, batch):
+		# resize the input only when the shape of the batch changes
+		if batch.shape != self.shape:
+			self.shape = batch.shape
+			self.interpreter.resize_tensor_input(self.inputIndex, batch.shape)
+			self.interpreter.allocate_tensors()
+
+		self.interpreter.set_tensor(self.inputIndex, batch)
+		self.interpreter.invoke()
+		return self.interpreter.get_tensor(self.outputIndex)
+
+class GenderClassifier:
+	def __init__(self, model, classes=('woman', 'man'), inputSize=(64, 64), maxBatch=32):
+		# store the keras (or TFLiteModel) model and the class names, the
+		# order of the names must follow the output nodes of the model
+		self.model = model
+		self.classes = list(classes)
+
+		# grab the fixed input shape of the model -- if the model was
+		# saved with undefined spatial dimensions we fall back to the
+		# given input size so every crop still has the same shape
+		shape = model.input_shape
+		(h, w) = shape[1:3]
+		if h is None or w is None:
+			(h, w) = inputSize
+		self.inputSize = (int(h), int(w))
+		self.channels = int(shape[-1] or 1)
+
+		# preallocate the batch buffer, it only grows when a frame has
+		# more crops than the buffer can hold
+		self.batch = np.zeros((maxBatch, self.inputSize[0],
+			self.inputSize[1], self.channels), dtype="float32")
+
+		# compile the forward pass once with a fixed input signature
+		# (only the batch dimension is free) so keras does not rebuild
+		# its predict function and retrace for every crop size, TFLite
+		# models run on their own interpreter without TensorFlow
+		if isinstance(model, TFLiteModel):
+			self._forward = None
+		else:
+			import tensorflow as tf
+			signature = [tf.TensorSpec((None, self.inputSize[0],
+				self.inputSize[1], self.channels), tf.float32)]
+			self._forward = tf.function(
+				lambda x: self.model(x, training=False),
+				input_signature=signature)
+
+		# count the crops sent to the model, the crops skipped because
+		# their track already has a settled gender and the time spent
+		# classifying them
+		self.reset()
+
+	def reset(self):
+		# drop the counts, e.g. the ones of the warm-up
+		self.inferences = 0
+		self.skipped = 0
+		self.seconds = 0.0
+
+	def preprocess(self, image, box):
+		# crop the bounding box from the frame, clip it to the frame
+		# boundaries and reject empty crops
+		(H, W) = image.shape[:2]
+		(xmin, ymin, xmax, ymax) = [int(v) for v in box]
+		(xmin, ymin) = (max(xmin, 0), max(ymin, 0))
+		(xmax, ymax) = (min(xmax, W), min(ymax, H))
+		if xmax <= xmin or ymax <= ymin:
+			return None
+
+		crop = image[ymin:ymax, xmin:xmax]
+		if self.channels == 1:
+			crop = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY)
+		else:
+			crop = cv2.cvtColor(crop, cv2.COLOR_BGR2RGB)
+
+		# resize to the fixed input shape of the model (cv2 takes the
+		# size as (width, height))
+		crop = cv2.resize(crop, (self.inputSize[1], self.inputSize[0]),
+			interpolation=cv2.INTER_AREA)
+		return crop.reshape(self.inputSize + (self.channels,))
+
+	def classify(self, image, boxes):
+		"""
+		Classify every bounding box of a frame with a single batched call.
+
+		Args:
+			image -> BGR frame as numpy array.
+			boxes -> dict of key -> (xmin, ymin, xmax, ymax).
+		Returns:
+			dict of key -> numpy array of class probabilities, or None when
+			the crop is empty.
+		"""
+		results = {key: None for key in boxes}
+		start = time.perf_counter()
+
+		# fill the batch buffer with every valid crop of the frame
+		keys = []
+		for (key, box) in boxes.items():
+			crop = self.preprocess(image, box)
+			if crop is None:
+				continue
+
+			if len(keys) == self.batch.shape[0]:
+				self.batch = np.concatenate([self.batch,
+					np.zeros_like(self.batch)], axis=0)
+
+			self.batch[len(keys)] = crop
+			keys.append(key)
+
+		if len(keys) == 0:
+			self.seconds += time.perf_counter() - start
+			return results
+
+		# normalize in place and run one forward pass for all crops
+		self.inferences += len(keys)
+		batch = self.batch[:len(keys)]
+		batch /= 255.0
+		if self._forward is None:
+			probs = self.model.predict(batch)
+		else:
+			probs = self._forward(batch).numpy()
+
+		for (key, p) in zip(keys, probs):
+			results[key] = p
+
+		self.seconds += time.perf_counter() - start
+		return results
+
+	def classify_tracks(self, image, boxes, genderObjects):
+		"""
+		Classify only the tracks whose gender decision is not settled yet.
+
+		Args:
+			image -> BGR frame as numpy array.
+			boxes -> dict of object ID -> (xmin, ymin, xmax, ymax).
+			genderObjects -> dict of object ID -> GenderObject.
+		Returns:
+			dict of object ID -> numpy array of class probabilities, or None
+			when the crop is empty. Settled tracks are left out.
+		"""
+		pending = {}
+		for (objectID, box) in boxes.items():
+			go = genderObjects.get(objectID, None)
+			if go is not None and go.settled():
+				self.skipped += 1
+				continue
+			pending[objectID] = box
+
+		return self.classify(image, pending)
+
+	def label(self, probs):
+		# map a probability vector to its class name
+		if probs is None:
+			return 'undetected'
+		return self.classes[int(np.argmax(probs))]
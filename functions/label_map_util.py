@@ -25,9 +25,6 @@ print('importing label_map_util')
 import numpy as np
 from six import string_types
 from six.moves import range
-print('loading tensorflow.compat.v1 in label_map_util...')
-import tensorflow.compat.v1 as tf
-print('tensorflow loaded.')
 from google.protobuf import text_format
 
 from functions import string_int_label_map_pb2
@@ -156,7 +153,8 @@ def load_labelmap(path):
   Returns:
     a StringIntLabelMapProto
   """
-  with tf.io.gfile.GFile(path, 'r') as fid:
+  # Plain file reading, so the label map loads without TensorFlow.
+  with open(path, 'r') as fid:
     label_map_string = fid.read()
     label_map = string_int_label_map_pb2.StringIntLabelMap()
     try:
@@ -0,0 +1,138 @@
+# import the necessary packages
+import datetime
+import time
+import csv
+import os
+import numpy as np
+
+# one row per tracked object per frame, frames without any object are
+# logged with an object ID and a location of -1 so the counts of every
+# frame are kept
+LOG_FIELDS = ['timestamp', 'frame', 'video_time', 'object_id', 'x', 'y',
+	'gender', 'total_up', 'man_up', 'woman_up', 'total_down', 'man_down',
+	'woman_down']
+
+LOG_DTYPE = [('timestamp', 'U26'), ('frame', 'i8'), ('video_time', 'f8'),
+	('object_id', 'i8'), ('x', 'i4'), ('y', 'i4'), ('gender', 'U10'),
+	('total_up', 'i8'), ('man_up', 'i8'), ('woman_up', 'i8'),
+	('total_down', 'i8'), ('man_down', 'i8'), ('woman_down', 'i8')]
+
+class TrackLogger:
+	def __init__(self, path, flushRows=500, flushSeconds=5.0,
+		maxBytes=64 * 1024 * 1024, backupCount=5):
+		# store the path of the log file, the number of rows and the
+		# number of seconds after which the buffer is written out, and
+		# the size at which the file is rotated (0 disables rotation)
+		self.path = path
+		self.flushRows = flushRows
+		self.flushSeconds = flushSeconds
+		self.maxBytes = maxBytes
+		self.backupCount = backupCount
+
+		# initialize the row buffer and open a fresh log file
+		self.rows = []
+		self.lastFlush = time.time()
+		self.file = None
+		self._open('w')
+
+	def _open(self, mode):
+		# open the log file and write the header of a new file
+		self.file = open(self.path, mode, newline='')
+		self.writer = csv.writer(self.file)
+		if self.file.tell() == 0:
+			self.writer.writerow(LOG_FIELDS)
+
+	def _rotate(self):
+		# shift the backups (log.csv.1 -> log.csv.2, ...) and move the
+		# current file to log.csv.1
+		self.file.close()
+		for i in range(self.backupCount - 1, 0, -1):
+			src = '{}.{}'.format(self.path, i)
+			if os.path.exists(src):
+				os.replace(src, '{}.{}'.format(self.path, i + 1))
+		if self.backupCount > 0:
+			os.replace(self.path, '{}.1'.format(self.path))
+		self._open('w')
+
+	def log(self, frame, videoTime, log_track, counter):
+		"""
+		Buffer the rows of one frame.
+
+		Args:
+			frame -> index of the frame.
+			videoTime -> position of the frame in the video, in seconds.
+			log_track -> list of dicts with the ID, location and gender of each object.
+			counter -> PeopleCounter holding the counts of the stream.
+		"""
+		timestamp = datetime.datetime.now().isoformat()
+		counts = [counter.totalUp, counter.manUp, counter.womanUp,
+			counter.totalDown, counter.manDown, counter.womanDown]
+
+		if len(log_track) == 0:
+			self.rows.append([timestamp, frame, videoTime, -1, -1, -1, ''] + counts)
+
+		for track in log_track:
+			(x, y) = track['location']
+			self.rows.append([timestamp, frame, videoTime, track['ID'],
+				int(x), int(y), track['gender'] or ''] + counts)
+
+		# write the buffer out every flushRows rows or flushSeconds seconds
+		if len(self.rows) >= self.flushRows or \
+			time.time() - self.lastFlush >= self.flushSeconds:
+			self.flush()
+
+	def flush(self):
+		# write the buffered rows, then rotate the file if it grew past
+		# its maximum size
+		if len(self.rows) > 0:
+			self.writer.writerows(self.rows)
+			self.rows = []
+		self.file.flush()
+		self.lastFlush = time.time()
+
+		if self.maxBytes > 0 and self.file.tell() >= self.maxBytes:
+			self._rotate()
+
+	def close(self):
+		# write the remaining rows and close the log file
+		self.flush()
+		self.file.close()
+
+def read_log(path):
+	"""
+	Function to read a log file written by TrackLogger.
+
+	Args:
+		path -> path of the log file.
+	Returns:
+		numpy structured array with one record per row, typed after LOG_DTYPE.
+	"""
+	return np.loadtxt(path, dtype=LOG_DTYPE, delimiter=',', skiprows=1,
+		ndmin=1)
+
+class MOTWriter:
+	def __init__(self, path, scale=1.0):
+		# write the tracked boxes in the MOTChallenge format (frame, id,
+		# left, top, width, height, conf, x, y, z) with 1-based frame
+		# numbers, the boxes are scaled back to the resolution of the
+		# source video so they compare with its ground truth
+		self.scale = scale
+		self.file = open(path, 'w', newline='')
+		self.writer = csv.writer(self.file)
+
+	def write(self, frame, boxes):
+		"""
+		Write the boxes of one frame.
+
+		Args:
+			frame -> 0-based index of the frame.
+			boxes -> dict of object ID -> (xmin, ymin, xmax, ymax).
+		"""
+		s = self.scale
+		self.writer.writerows([[frame + 1, objectID, round(xmin * s, 1),
+			round(ymin * s, 1), round((xmax - xmin) * s, 1),
+			round((ymax - ymin) * s, 1), 1, -1, -1, -1]
+			for (objectID, (xmin, ymin, xmax, ymax)) in boxes.items()])
+
+	def close(self):
+		self.file.close()
@@ -0,0 +1,224 @@
+# import the necessary packages
+from scipy.optimize import linear_sum_assignment
+from object_detection.utils import np_box_ops
+import numpy as np
+
+def read_mot(path, groundTruth=False):
+	"""
+	Read a MOTChallenge-style text file, one box per line as frame, id,
+	left, top, width, height[, conf, class, ...], comma or space separated.
+
+	Args:
+		path -> path of the file.
+		groundTruth -> drop the boxes flagged to be ignored (conf 0) and the
+			boxes of classes other than pedestrians (class 1, or -1 when
+			there is no class).
+	Returns:
+		numpy array of (frame, id, xmin, ymin, xmax, ymax) rows sorted by
+		frame.
+	"""
+	with open(path) as f:
+		delimiter = ',' if ',' in f.readline() else None
+	rows = np.loadtxt(path, delimiter=delimiter, ndmin=2)
+	if len(rows) == 0:
+		return np.zeros((0, 6))
+
+	if groundTruth and rows.shape[1] >= 7:
+		keep = rows[:, 6] != 0
+		if rows.shape[1] >= 8:
+			keep &= (rows[:, 7] == 1) | (rows[:, 7] == -1)
+		rows = rows[keep]
+
+	boxes = np.stack([rows[:, 0], rows[:, 1], rows[:, 2], rows[:, 3],
+		rows[:, 2] + rows[:, 4], rows[:, 3] + rows[:, 5]], axis=1)
+	return boxes[np.argsort(boxes[:, 0], kind='stable')]
+
+def frames(rows):
+	# split (frame, id, box) rows sorted by frame into one group per frame
+	(values, starts) = np.unique(rows[:, 0], return_index=True)
+	ends = np.append(starts[1:], len(rows))
+	return {int(frame): rows[start:end] for (frame, start, end) in zip(values, starts, ends)}
+
+class MOTEvaluator:
+	def __init__(self, iouThreshold=0.5):
+		# minimum IoU between a ground truth box and a tracked box for
+		# them to be matched
+		self.iouThreshold = iouThreshold
+
+		# CLEAR MOT counts: ground truth boxes, tracked boxes, matches,
+		# misses, false positives, identity switches and the sum of the
+		# IoU of the matches
+		self.numGT = 0
+		self.numHyp = 0
+		self.matches = 0
+		self.misses = 0
+		self.falsePositives = 0
+		self.switches = 0
+		self.iouSum = 0.0
+
+		# last tracked ID matched with every ground truth ID, and the
+		# current matches kept from frame to frame as in CLEAR MOT
+		self.lastMatch = {}
+
+		# overlapping (ground truth ID, tracked ID) pairs of every frame,
+		# counted for the global identity matching of IDF1, and the sets
+		# of IDs seen
+		self.overlaps = []
+		self.gtSeen = set()
+		self.hypSeen = set()
+
+		# absolute error of the number of people of every frame
+		self.countErrors = 0
+		self.frames = 0
+
+	def update(self, gtIDs, gtBoxes, hypIDs, hypBoxes, iou=None):
+		"""
+		Match the boxes of one frame.
+
+		Args:
+			gtIDs -> array of ground truth IDs.
+			gtBoxes -> array of (xmin, ymin, xmax, ymax) ground truth boxes.
+			hypIDs -> array of tracked IDs.
+			hypBoxes -> array of (xmin, ymin, xmax, ymax) tracked boxes.
+			iou -> optional precomputed IoU matrix of the ground truth and
+				tracked boxes.
+		"""
+		gtIDs = np.asarray(gtIDs, dtype="int64").reshape(-1)
+		hypIDs = np.asarray(hypIDs, dtype="int64").reshape(-1)
+		gtBoxes = np.asarray(gtBoxes, dtype="float").reshape(-1, 4)
+		hypBoxes = np.asarray(hypBoxes, dtype="float").reshape(-1, 4)
+
+		self.frames += 1
+		self.numGT += len(gtIDs)
+		self.numHyp += len(hypIDs)
+		self.countErrors += abs(len(gtIDs) - len(hypIDs))
+		self.gtSeen.update(gtIDs.tolist())
+		self.hypSeen.update(hypIDs.tolist())
+
+		if len(gtIDs) == 0 or len(hypIDs) == 0:
+			self.misses += len(gtIDs)
+			self.falsePositives += len(hypIDs)
+			return
+
+		# pairwise IoU of the frame, np_box_ops takes (ymin, xmin, ymax,
+		# xmax) boxes
+		if iou is None:
+			iou = np_box_ops.iou(gtBoxes[:, [1, 0, 3, 2]], hypBoxes[:, [1, 0, 3, 2]])
+		valid = iou >= self.iouThreshold
+
+		# every overlapping pair counts towards the identity matching
+		(i, j) = np.nonzero(valid)
+		self.overlaps.append(np.stack([gtIDs[i], hypIDs[j]], axis=1))
+
+		# matches of the previous frame are kept while they still
+		# overlap, the others are matched by maximum total IoU
+		cost = np.where(valid, 1.0 - iou, np.inf)
+		hypIndex = {h: j for (j, h) in enumerate(hypIDs.tolist())}
+		for (i, g) in enumerate(gtIDs.tolist()):
+			j = hypIndex.get(self.lastMatch.get(g, None), None)
+			if j is not None and valid[i, j]:
+				cost[i, :] = np.inf
+				cost[:, j] = np.inf
+				cost[i, j] = -1.0
+
+		finite = np.where(np.isfinite(cost), cost, 1e6)
+		(rows, cols) = linear_sum_assignment(finite)
+		matched = np.isfinite(cost[rows, cols])
+		(rows, cols) = (rows[matched], cols[matched])
+
+		for (i, j) in zip(rows.tolist(), cols.tolist()):
+			g = int(gtIDs[i])
+			h = int(hypIDs[j])
+			if g in self.lastMatch and self.lastMatch[g] != h:
+				self.switches += 1
+			self.lastMatch[g] = h
+
+		self.matches += len(rows)
+		self.iouSum += float(iou[rows, cols].sum())
+		self.misses += len(gtIDs) - len(rows)
+		self.falsePositives += len(hypIDs) - len(rows)
+
+	def summary(self):
+		"""
+		Compute the metrics of every frame seen so far.
+
+		Returns:
+			dict with MOTA, MOTP (mean IoU of the matches), IDF1, the
+			number of identity switches, misses, false positives, ground
+			truth and tracked IDs, the error on the number of IDs and the
+			mean absolute error of the number of people per frame.
+		"""
+		# IDF1: one to one matching of the ground truth and tracked IDs
+		# maximizing the number of frames they overlap
+		idtp = 0
+		if len(self.overlaps) > 0:
+			pairs = np.concatenate(self.overlaps)
+			(gts, gi) = np.unique(pairs[:, 0], return_inverse=True)
+			(hyps, hi) = np.unique(pairs[:, 1], return_inverse=True)
+			weights = np.zeros((len(gts), len(hyps)))
+			np.add.at(weights, (gi.reshape(-1), hi.reshape(-1)), 1)
+			(rows, cols) = linear_sum_assignment(-weights)
+			idtp = int(weights[rows, cols].sum())
+		idfn = self.numGT - idtp
+		idfp = self.numHyp - idtp
+
+		return {
+			'MOTA': 1.0 - (self.misses + self.falsePositives + self.switches) / float(max(self.numGT, 1)),
+			'MOTP': self.iouSum / max(self.matches, 1),
+			'IDF1': 2.0 * idtp / max(2 * idtp + idfp + idfn, 1),
+			'id_switches': self.switches,
+			'misses': self.misses,
+			'false_positives': self.falsePositives,
+			'gt_ids': len(self.gtSeen),
+			'tracked_ids': len(self.hypSeen),
+			'id_count_error': len(self.hypSeen) - len(self.gtSeen),
+			'count_mae': self.countErrors / float(max(self.frames, 1)),
+			'frames': self.frames}
+
+def evaluate(gt, hyp, iouThreshold=0.5, maxBlock=64):
+	"""
+	Evaluate tracks against ground truth, frame by frame. The IoU of
+	consecutive frames is computed in blocks of up to maxBlock boxes, so
+	long sequences need few np_box_ops calls.
+
+	Args:
+		gt -> (frame, id, xmin, ymin, xmax, ymax) rows, e.g. from read_mot.
+		hyp -> (frame, id, xmin, ymin, xmax, ymax) rows of the tracker.
+		iouThreshold -> minimum IoU of a match.
+		maxBlock -> maximum number of boxes of a block.
+	Returns:
+		dict of metrics, see MOTEvaluator.summary.
+	"""
+	evaluator = MOTEvaluator(iouThreshold=iouThreshold)
+	gtFrames = frames(gt)
+	hypFrames = frames(hyp)
+	empty = np.zeros((0, 6))
+	allFrames = sorted(set(gtFrames) | set(hypFrames))
+
+	start = 0
+	while start < len(allFrames):
+		# gather consecutive frames until the block is full
+		end = start
+		(numGT, numHyp) = (0, 0)
+		while end < len(allFrames) and (end == start or max(numGT, numHyp) < maxBlock):
+			numGT += len(gtFrames.get(allFrames[end], empty))
+			numHyp += len(hypFrames.get(allFrames[end], empty))
+			end += 1
+
+		block = allFrames[start:end]
+		g = np.concatenate([gtFrames.get(frame, empty) for frame in block])
+		h = np.concatenate([hypFrames.get(frame, empty) for frame in block])
+		iou = np_box_ops.iou(g[:, [3, 2, 5, 4]], h[:, [3, 2, 5, 4]])
+
+		# the IoU of every frame is its diagonal block of the matrix
+		(gi, hi) = (0, 0)
+		for frame in block:
+			fg = gtFrames.get(frame, empty)
+			fh = hypFrames.get(frame, empty)
+			evaluator.update(fg[:, 1], fg[:, 2:], fh[:, 1], fh[:, 2:],
+				iou=iou[gi:gi + len(fg), hi:hi + len(fh)])
+			(gi, hi) = (gi + len(fg), hi + len(fh))
+
+		start = end
+
+	return evaluator.summary()
@@ -0,0 +1,70 @@
+# import the necessary packages
+import cv2
+
+class MotionGate:
+	def __init__(self, width=160, threshold=25, minArea=0.001, alpha=0.05):
+		# store the width of the low resolution frame the motion is
+		# measured on, the minimum pixel difference to the background
+		# for a pixel to count as moving, the minimum fraction of moving
+		# pixels for the frame to count as moving and the learning rate
+		# of the running average background
+		self.width = width
+		self.threshold = threshold
+		self.minArea = minArea
+		self.alpha = alpha
+
+		# initialize the background model, the last motion mask, its
+		# size relative to the frame and the fraction of moving pixels
+		# of the last frame
+		self.background = None
+		self.mask = None
+		self.scale = 1.0
+		self.motion = 0.0
+
+		# count the frames seen by the gate and the frames gated out
+		self.frames = 0
+		self.gated = 0
+
+	def update(self, image):
+		"""
+		Measure the motion of a frame against the background model.
+
+		Args:
+			image -> BGR frame as numpy array.
+		Returns:
+			True if enough pixels changed for the frame to be processed.
+		"""
+		# downscale, convert to grayscale and blur the frame so the gate
+		# costs a fraction of the detector and ignores sensor noise
+		(h, w) = image.shape[:2]
+		size = (self.width, max(1, int(h * self.width / float(w))))
+		self.scale = self.width / float(w)
+		small = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+		gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+		gray = cv2.GaussianBlur(gray, (5, 5), 0)
+		self.frames += 1
+
+		# the first frame initializes the background and is always
+		# processed
+		if self.background is None:
+			self.background = gray.astype("float")
+			self.mask = None
+			self.motion = 1.0
+			return True
+
+		# threshold the difference with the background, then blend the
+		# frame into the background
+		diff = cv2.absdiff(gray, cv2.convertScaleAbs(self.background))
+		self.mask = cv2.threshold(diff, self.threshold, 255,
+			cv2.THRESH_BINARY)[1]
+		cv2.accumulateWeighted(gray, self.background, self.alpha)
+
+		self.motion = cv2.countNonZero(self.mask) / float(self.mask.size)
+		if self.motion < self.minArea:
+			self.gated += 1
+			return False
+		return True
+
+	def gated_fraction(self):
+		# fraction of the frames gated out so far
+		return self.gated / float(max(self.frames, 1))
@@ -0,0 +1,69 @@
+# import the necessary packages
+from collections import OrderedDict
+import numpy as np
+
+class ObjectTracker:
+	# base of the object trackers (CentroidTracker, SortTracker): the
+	# object IDs, their lifecycle callbacks and the views of the live
+	# objects. Subclasses keep the `ids`, `centroids` and `missing`
+	# arrays, whose first `count` rows hold the live objects
+	def __init__(self):
+		# initialize the next unique object ID
+		self.nextObjectID = 0
+
+		# initialize the lists of callbacks notified with the object ID
+		# and the centroid of every registered and deregistered object
+		self.registerCallbacks = []
+		self.deregisterCallbacks = []
+
+		# optional callback(centroid) returning the ID of a recently
+		# expired object a new object is recovered as, or None
+		self.recoverCallback = None
+
+	def on_register(self, callback):
+		# subscribe a callback(objectID, centroid) to new objects
+		self.registerCallbacks.append(callback)
+
+	def on_deregister(self, callback):
+		# subscribe a callback(objectID, centroid) to expired objects,
+		# downstream per-object state can be evicted through it
+		self.deregisterCallbacks.append(callback)
+
+	def on_recover(self, callback):
+		# set the callback(centroid) deciding whether a new object is a
+		# recently expired object coming back, in which case it keeps
+		# its old ID
+		self.recoverCallback = callback
+
+	def next_ids(self, centroids):
+		# recovered IDs for the objects coming back, the next available
+		# object IDs for the others
+		ids = []
+		for centroid in centroids:
+			objectID = None
+			if self.recoverCallback is not None:
+				objectID = self.recoverCallback(centroid)
+			if objectID is None:
+				objectID = self.nextObjectID
+				self.nextObjectID += 1
+			ids.append(objectID)
+		return np.array(ids, dtype="int64")
+
+	def notify(self, callbacks, ids, centroids):
+		# call every callback with each object ID and its centroid
+		for callback in callbacks:
+			for (objectID, centroid) in zip(ids.tolist(), centroids.copy()):
+				callback(objectID, centroid)
+
+	@property
+	def objects(self):
+		# map each live object ID to a copy of its centroid, in
+		# registration order (the arrays are reused between frames)
+		return OrderedDict(zip(self.ids[:self.count].tolist(),
+			self.centroids[:self.count].copy()))
+
+	@property
+	def disappeared(self):
+		# map each live object ID to its number of disappeared frames
+		return OrderedDict(zip(self.ids[:self.count].tolist(),
+			self.missing[:self.count].tolist()))
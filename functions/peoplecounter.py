@@ -0,0 +1,190 @@
+# import the necessary packages
+from collections import OrderedDict
+import numpy as np
+from functions.centroidtracker import CentroidTracker
+from functions.trackableobject import TrackableObject, GenderObject
+
+class PeopleCounter:
+	def __init__(self, maxDisappeared=50, maxDistance=50, genderVotes=3,
+		genderConfidence=0.0, maxExpired=0, expiredAge=30, tracker=None):
+		# initialize the object tracker (a centroid tracker unless
+		# another tracker with the same interface is given, such as a
+		# SortTracker) along with the dictionaries mapping an object ID
+		# to its trackable object and its gender object
+		self.ct = tracker
+		if self.ct is None:
+			self.ct = CentroidTracker(maxDisappeared=maxDisappeared,
+				maxDistance=maxDistance)
+		self.trackableObjects = {}
+		self.genderObjects = {}
+
+		# evict the per-object state when the tracker deregisters an
+		# object, keeping the state of the `maxExpired` most recently
+		# expired objects so that a new object appearing within
+		# `maxDistance` pixels of one of them, at most `expiredAge`
+		# updates after it expired, is recovered with its old ID,
+		# trajectory, count and gender
+		self.expired = OrderedDict()
+		self.maxExpired = maxExpired
+		self.expiredAge = expiredAge
+		self.maxDistance = maxDistance
+		self.updates = 0
+		self.ct.on_deregister(self.evict)
+		if maxExpired > 0:
+			self.ct.on_recover(self.recover)
+
+		# store the gender voting parameters of new gender objects
+		self.genderVotes = genderVotes
+		self.genderConfidence = genderConfidence
+
+		# initialize the number of people that went up or down, in
+		# total and per gender (people of unknown gender only count in
+		# the totals)
+		self.totalUp = 0
+		self.totalDown = 0
+		self.manUp = 0
+		self.manDown = 0
+		self.womanUp = 0
+		self.womanDown = 0
+
+	def evict(self, objectID, centroid):
+		# drop the trackable and gender objects of an expired object
+		to = self.trackableObjects.pop(objectID, None)
+		go = self.genderObjects.pop(objectID, None)
+
+		# archive them in the bounded LRU of recently expired objects,
+		# along with their last centroid and the time they expired
+		if self.maxExpired > 0 and to is not None:
+			self.expired[objectID] = (to, go, np.array(centroid, dtype="float"),
+				self.updates)
+			while len(self.expired) > self.maxExpired:
+				self.expired.popitem(last=False)
+
+	def recover(self, centroid):
+		# drop the archived objects expired for too long
+		while len(self.expired) > 0:
+			(_, state) = next(iter(self.expired.items()))
+			if self.updates - state[3] <= self.expiredAge:
+				break
+			self.expired.popitem(last=False)
+		if len(self.expired) == 0:
+			return None
+
+		# find the nearest recently expired object, a new object further
+		# than maxDistance from all of them is a new person
+		ids = list(self.expired.keys())
+		last = np.array([self.expired[objectID][2] for objectID in ids])
+		D = np.linalg.norm(last - np.asarray(centroid, dtype="float"), axis=1)
+		i = int(np.argmin(D))
+		if D[i] > self.maxDistance:
+			return None
+
+		# restore its trackable and gender objects, the tracker reuses
+		# its ID
+		objectID = ids[i]
+		(to, go, _, _) = self.expired.pop(objectID)
+		self.trackableObjects[objectID] = to
+		if go is not None:
+			self.genderObjects[objectID] = go
+		return objectID
+
+	def snapshot(self):
+		"""
+		Report the tracked objects without updating the tracker, for frames
+		that are not processed (e.g. gated out for lack of motion).
+
+		Returns:
+			objects -> dict of object ID -> centroid.
+			log_track -> list of dicts with the ID, location and gender of each object.
+		"""
+		objects = self.ct.objects
+		log_track = []
+		for (objectID, centroid) in objects.items():
+			go = self.genderObjects.get(objectID, None)
+			log_track.append({'ID': objectID, 'location': centroid,
+				'gender': go.gender if go is not None else None})
+
+		return objects, log_track
+
+	def update(self, rects, centroCoordDict, image, genderClassifier):
+		"""
+		Associate the boxes of a frame with the tracked objects, classify the
+		gender of the objects and count the objects crossing the frame.
+
+		Args:
+			rects -> list of (xmin, ymin, xmax, ymax) boxes of the frame.
+			centroCoordDict -> dict of centroid -> box of the frame.
+			image -> BGR frame as numpy array.
+			genderClassifier -> GenderClassifier, or None to count without
+				classifying the gender.
+		Returns:
+			objects -> dict of object ID -> centroid.
+			log_track -> list of dicts with the ID, location and gender of each object.
+		"""
+		H = image.shape[0]
+		self.updates += 1
+
+		# use the centroid tracker to associate the old object centroids
+		# with the newly computer object centroids
+		objects = self.ct.update(rects)
+
+		# crops of all tracks without a settled gender go through the
+		# gender model in one batched call
+		trackBoxes = {}
+		for (objectID, centroid) in objects.items():
+			box = centroCoordDict.get((centroid[0], centroid[1]), None)
+			if box is not None:
+				trackBoxes[objectID] = box
+		genderProbs = {}
+		if genderClassifier is not None:
+			genderProbs = genderClassifier.classify_tracks(image, trackBoxes,
+				self.genderObjects)
+
+		log_track = []
+
+		for (objectID, centroid) in objects.items():
+			# check to see if a trackable object exists for the current
+			# object ID
+			go = self.genderObjects.get(objectID, None)
+			to = self.trackableObjects.get(objectID, None)
+
+			if go is None:
+				go = GenderObject(objectID, maxVotes=self.genderVotes,
+					minConfidence=self.genderConfidence)
+
+			# settled tracks have no entry in the probabilities, so they
+			# take no more votes
+			probs = genderProbs.get(objectID, None)
+			if probs is not None:
+				go.vote(genderClassifier.label(probs), float(np.max(probs)))
+
+			self.genderObjects[objectID] = go
+
+			if to is None:
+				to = TrackableObject(objectID, centroid)
+			else:
+				to.append(centroid)
+				direction = to.direction()
+
+				if not to.counted:
+					if direction < -(H / 5):
+						self.totalUp += 1
+						if go.gender == 'man':
+							self.manUp += 1
+						elif go.gender == 'woman':
+							self.womanUp += 1
+						to.counted = True
+					elif direction > H / 5:
+						self.totalDown += 1
+						if go.gender == 'man':
+							self.manDown += 1
+						elif go.gender == 'woman':
+							self.womanDown += 1
+						to.counted = True
+
+			self.trackableObjects[objectID] = to
+
+			log_track.append({'ID': objectID, 'location': centroid,
+				'gender': go.gender})
+
+		return objects, log_track
@@ -0,0 +1,124 @@
+# import the necessary packages
+from collections import OrderedDict
+from threading import Lock
+import numpy as np
+import math
+import time
+
+class StageProfiler:
+	def __init__(self, stages=(), binsPerDecade=20, minSeconds=1e-6,
+		maxSeconds=100.0, interval=10.0):
+		# every stage keeps a histogram of its durations over
+		# logarithmic bins from minSeconds to maxSeconds, recording a
+		# duration is a single counter increment so the profiler can
+		# stay on in production
+		self.binsPerDecade = binsPerDecade
+		self.minSeconds = minSeconds
+		self.numBins = int(math.ceil(binsPerDecade * math.log10(maxSeconds / minSeconds))) + 1
+
+		# upper edge of every bin, the reported percentiles are the
+		# upper edge of the bin they fall in (within 12% with 20 bins
+		# per decade)
+		self.edges = minSeconds * 10.0 ** ((np.arange(self.numBins) + 1.0) / binsPerDecade)
+
+		# histograms, number of samples and total time of every stage,
+		# in order of first use (or of the given stages)
+		self.histograms = OrderedDict()
+		self.counts = OrderedDict()
+		self.totals = OrderedDict()
+		for stage in stages:
+			self._add_stage(stage)
+
+		# stages are also recorded from the decoding and detection
+		# threads
+		self.lock = Lock()
+
+		# number of seconds between two periodic summaries (0 disables
+		# them) and time of the last summary
+		self.interval = interval
+		self.lastSummary = time.time()
+
+	def _add_stage(self, stage):
+		self.histograms[stage] = [0] * self.numBins
+		self.counts[stage] = 0
+		self.totals[stage] = 0.0
+
+	def add(self, stage, seconds):
+		# find the bin of the duration and increment it
+		if seconds <= self.minSeconds:
+			b = 0
+		else:
+			b = min(int(self.binsPerDecade * math.log10(seconds / self.minSeconds)), self.numBins - 1)
+
+		with self.lock:
+			if stage not in self.histograms:
+				self._add_stage(stage)
+			self.histograms[stage][b] += 1
+			self.counts[stage] += 1
+			self.totals[stage] += seconds
+
+	def measure(self, stage):
+		# context manager recording the duration of its block
+		return StageTimer(self, stage)
+
+	def percentile(self, stage, q):
+		"""
+		Percentile of the durations of a stage.
+
+		Args:
+			stage -> name of the stage.
+			q -> percentile, between 0 and 100.
+		Returns:
+			duration in seconds, or None when the stage has no sample.
+		"""
+		with self.lock:
+			counts = np.array(self.histograms[stage])
+		if counts.sum() == 0:
+			return None
+		cumulative = np.cumsum(counts)
+		b = int(np.searchsorted(cumulative, q / 100.0 * cumulative[-1]))
+		return float(self.edges[min(b, self.numBins - 1)])
+
+	def summary(self):
+		"""
+		Table of the number of samples, mean, p50, p95 and p99 of every
+		stage, in milliseconds.
+		"""
+		lines = ['{:>12} {:>8} {:>9} {:>9} {:>9} {:>9}'.format('stage', 'count', 'mean ms',
+			'p50 ms', 'p95 ms', 'p99 ms')]
+		for stage in list(self.histograms):
+			if self.counts[stage] == 0:
+				continue
+			mean = self.totals[stage] / self.counts[stage]
+			(p50, p95, p99) = [self.percentile(stage, q) for q in (50, 95, 99)]
+			lines.append('{:>12} {:>8} {:>9.2f} {:>9.2f} {:>9.2f} {:>9.2f}'.format(stage,
+				self.counts[stage], 1000 * mean, 1000 * p50, 1000 * p95, 1000 * p99))
+		return '\n'.join(lines)
+
+	def due(self):
+		# check whether the periodic summary is due, and restart the
+		# period if so
+		if self.interval <= 0 or time.time() - self.lastSummary < self.interval:
+			return False
+		self.lastSummary = time.time()
+		return True
+
+	def reset(self):
+		# drop every sample, e.g. the ones recorded while warming up
+		with self.lock:
+			for stage in self.histograms:
+				self._add_stage(stage)
+		self.lastSummary = time.time()
+
+class StageTimer:
+	def __init__(self, profiler, stage):
+		self.profiler = profiler
+		self.stage = stage
+
+	def __enter__(self):
+		self.start = time.perf_counter()
+		return self
+
+	def __exit__(self, *exc):
+		self.profiler.add(self.stage, time.perf_counter() - self.start)
+		return False
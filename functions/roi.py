@@ -0,0 +1,51 @@
+# import the necessary packages
+import numpy as np
+import cv2
+
+class RegionOfInterest:
+	def __init__(self, points):
+		# store the polygon of the region as an array of (x, y) points,
+		# a rectangle is given by its two opposite corners
+		points = np.asarray(points, dtype="int32").reshape(-1, 2)
+		if len(points) == 2:
+			((x1, y1), (x2, y2)) = points
+			points = np.array([(x1, y1), (x2, y1), (x2, y2), (x1, y2)],
+				dtype="int32")
+		self.points = points
+
+		# the bounding rectangle of the polygon is the crop given to
+		# the detector
+		(self.x, self.y, self.w, self.h) = cv2.boundingRect(self.points)
+
+	@classmethod
+	def parse(cls, text):
+		# build a region from a comma separated list of coordinates,
+		# "x1,y1,x2,y2" for a rectangle or "x1,y1,x2,y2,x3,y3,..." for
+		# a polygon
+		values = [int(v) for v in text.split(',')]
+		if len(values) < 4 or len(values) % 2 != 0:
+			raise ValueError('a region of interest needs an even number of '
+				'coordinates, at least 4: {}'.format(text))
+		return cls(values)
+
+	def crop(self, image):
+		# crop the bounding rectangle of the region, clipped to the frame
+		(x1, y1) = (max(self.x, 0), max(self.y, 0))
+		(x2, y2) = (min(self.x + self.w, image.shape[1]),
+			min(self.y + self.h, image.shape[0]))
+		return image[y1:y2, x1:x2], (x1, y1)
+
+	def contains(self, x, y):
+		# check to see if a point lies inside (or on the edge of) the
+		# polygon
+		return cv2.pointPolygonTest(self.points.reshape(-1, 1, 2),
+			(float(x), float(y)), False) >= 0
+
+	def draw(self, image, color=(255, 0, 0)):
+		# outline the region on the frame
+		return cv2.polylines(image, [self.points.reshape(-1, 1, 2)], True,
+			color, 1)
+
+def in_regions(regions, x, y):
+	"""Function to check if a point lies in any region, every point lies in an empty list of regions."""
+	return len(regions) == 0 or any(r.contains(x, y) for r in regions)
@@ -0,0 +1,136 @@
+# import the necessary packages
+import numpy as np
+import cv2
+
+class DetectionScheduler:
+	def __init__(self, minInterval=20, maxInterval=20, minConfidence=7.0,
+		speedScale=5.0, crowdScale=10.0, minMotion=0.001, regions=(),
+		boxMargin=0.25):
+		# store the minimum and maximum number of frames between two
+		# detections -- with equal bounds the detector runs at a fixed
+		# cadence, like the original --skip_frame
+		self.minInterval = minInterval
+		self.maxInterval = maxInterval
+
+		# store the tracker confidence (the peak-to-sidelobe ratio
+		# returned by dlib correlation_tracker.update) under which a
+		# track is considered lost, and the speed (pixels per frame) and
+		# number of tracks that halve the interval between detections
+		self.minConfidence = minConfidence
+		self.speedScale = speedScale
+		self.crowdScale = crowdScale
+
+		# store the fraction of moving pixels (from the motion gate)
+		# over which motion in a scene without tracks calls for a
+		# detection -- someone is probably entering the scene. With the
+		# motion mask, only the motion inside the regions of interest
+		# and away from the tracked boxes (grown by boxMargin of their
+		# size) counts, and it calls for a detection even when the
+		# scene has tracks
+		self.minMotion = minMotion
+		self.regions = list(regions)
+		self.boxMargin = boxMargin
+		self.regionMask = None
+
+		# initialize the index of the last detection frame, the signals
+		# of the last observed frame and the previous centroids used to
+		# measure the speed of the tracks
+		self.lastDetection = None
+		self.numTracks = 0
+		self.confidence = np.inf
+		self.speed = 0.0
+		self.motion = None
+		self.untracked = False
+		self.previous = {}
+
+	def observe(self, objects, confidences=(), motion=None, mask=None,
+		boxes=(), scale=1.0):
+		"""
+		Update the scheduler with the tracking result of a frame.
+
+		Args:
+			objects -> dict of object ID -> centroid, from the centroid tracker.
+			confidences -> update() return values of the short-term trackers.
+			motion -> fraction of moving pixels of the frame, None without motion gate.
+			mask -> motion mask of the frame from the motion gate, or None.
+			boxes -> (xmin, ymin, xmax, ymax) tracked boxes of the frame.
+			scale -> size of the motion mask relative to the frame.
+		"""
+		self.numTracks = len(objects)
+		self.motion = motion
+
+		# with equal bounds the detector runs at a fixed cadence whatever
+		# the scene does, so the motion away from the tracks is not
+		# worth measuring
+		self.untracked = mask is not None and self.minInterval < self.maxInterval
+		if self.untracked:
+			self.motion = self.untracked_motion(mask, boxes, scale)
+		self.confidence = min(confidences) if len(confidences) > 0 else np.inf
+
+		# mean displacement of the objects seen in both frames
+		common = [objectID for objectID in objects if objectID in self.previous]
+		if len(common) > 0:
+			current = np.array([objects[objectID] for objectID in common], dtype="float")
+			previous = np.array([self.previous[objectID] for objectID in common], dtype="float")
+			self.speed = float(np.linalg.norm(current - previous, axis=1).mean())
+		else:
+			self.speed = 0.0
+
+		self.previous = dict(objects)
+
+	def untracked_motion(self, mask, boxes, scale):
+		# build the mask of the regions of interest once per mask size
+		if self.regionMask is None or self.regionMask.shape != mask.shape:
+			self.regionMask = np.zeros(mask.shape, dtype="uint8")
+			if len(self.regions) == 0:
+				self.regionMask[:] = 1
+			for region in self.regions:
+				points = np.round(region.points * scale).astype("int32")
+				cv2.fillPoly(self.regionMask, [points.reshape(-1, 1, 2)], 1)
+
+		# clear the tracked boxes, grown by the margin, from the regions
+		valid = self.regionMask.copy()
+		for (xmin, ymin, xmax, ymax) in boxes:
+			(dx, dy) = (self.boxMargin * (xmax - xmin), self.boxMargin * (ymax - ymin))
+			(x1, y1) = (max(int((xmin - dx) * scale), 0), max(int((ymin - dy) * scale), 0))
+			(x2, y2) = (int(np.ceil((xmax + dx) * scale)), int(np.ceil((ymax + dy) * scale)))
+			valid[y1:y2, x1:x2] = 0
+
+		# fraction of the pixels of the mask moving where nothing is
+		# tracked
+		return cv2.countNonZero(cv2.bitwise_and(mask, mask, mask=valid)) / float(mask.size)
+
+	def interval(self):
+		# shrink the interval from its maximum as the scene gets busier
+		# and faster, and clamp it to the bounds
+		factor = (1.0 + self.speed / self.speedScale) * \
+			(1.0 + self.numTracks / self.crowdScale)
+		interval = self.maxInterval / factor
+		return int(max(self.minInterval, min(self.maxInterval, interval)))
+
+	def due(self, framecount):
+		# always detect on the first frame
+		if self.lastDetection is None:
+			return True
+
+		since = framecount - self.lastDetection
+		if since < self.minInterval:
+			return False
+		if since >= self.maxInterval:
+			return True
+
+		# a short-term tracker losing its target calls for a detection
+		if self.confidence < self.minConfidence:
+			return True
+
+		# so does motion in a scene without any track, or with the
+		# motion mask, motion away from every track
+		if (self.numTracks == 0 or self.untracked) and \
+			self.motion is not None and self.motion >= self.minMotion:
+			return True
+
+		return since >= self.interval()
+
+	def detected(self, framecount):
+		# record the frame a detection was run on
+		self.lastDetection = framecount
@@ -0,0 +1,168 @@
+# import the necessary packages
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import cv2
+
+class ShortTermTracker:
+	# confidence under which a track is considered lost, the scale of
+	# the confidence depends on the engine
+	lostConfidence = 0.0
+
+	def start(self, rgb, boxes):
+		"""
+		Start tracking a new set of boxes, dropping the previous ones.
+
+		Args:
+			rgb -> RGB frame as numpy array.
+			boxes -> array-like of (xmin, ymin, xmax, ymax) boxes.
+		"""
+		raise NotImplementedError
+
+	def update(self, rgb):
+		"""
+		Propagate every box to a new frame.
+
+		Args:
+			rgb -> RGB frame as numpy array.
+		Returns:
+			boxes -> numpy array of (xmin, ymin, xmax, ymax) boxes.
+			confidences -> numpy array with the confidence of each box.
+		"""
+		raise NotImplementedError
+
+	def __len__(self):
+		raise NotImplementedError
+
+	def close(self):
+		pass
+
+class DlibTracker(ShortTermTracker):
+	# dlib correlation_tracker.update returns the peak-to-sidelobe
+	# ratio of the correlation, values under 7 mean the target is lost
+	lostConfidence = 7.0
+
+	def __init__(self, threads=1):
+		# dlib is only needed by this engine
+		import dlib
+		self.dlib = dlib
+
+		# one correlation tracker per object, updated by a thread pool
+		# when more than one thread is used
+		self.trackers = []
+		self.pool = ThreadPoolExecutor(max_workers=threads) if threads > 1 else None
+
+	def start(self, rgb, boxes):
+		self.trackers = []
+		for (xmin, ymin, xmax, ymax) in np.asarray(boxes).reshape(-1, 4):
+			tracker = self.dlib.correlation_tracker()
+			rect = self.dlib.rectangle(int(xmin), int(ymin), int(xmax), int(ymax))
+			tracker.start_track(rgb, rect)
+			self.trackers.append(tracker)
+
+	def update(self, rgb):
+		if self.pool is not None and len(self.trackers) > 1:
+			confidences = list(self.pool.map(lambda t: t.update(rgb), self.trackers))
+		else:
+			confidences = [t.update(rgb) for t in self.trackers]
+
+		boxes = []
+		for tracker in self.trackers:
+			pos = tracker.get_position()
+			boxes.append((int(pos.left()), int(pos.top()), int(pos.right()),
+				int(pos.bottom())))
+
+		return (np.array(boxes, dtype="int").reshape(-1, 4),
+			np.array(confidences, dtype="float"))
+
+	def __len__(self):
+		return len(self.trackers)
+
+	def close(self):
+		if self.pool is not None:
+			self.pool.shutdown()
+
+class OpticalFlowTracker(ShortTermTracker):
+	# the confidence is the fraction of the points of a box that were
+	# tracked successfully
+	lostConfidence = 0.5
+
+	def __init__(self, gridSize=4, winSize=(15, 15), maxLevel=2):
+		# store the number of points per side of the grid seeded in
+		# every box and the parameters of the pyramidal Lucas-Kanade
+		# optical flow
+		self.gridSize = gridSize
+		self.winSize = winSize
+		self.maxLevel = maxLevel
+
+		# grid offsets, as fractions of the box size, covering the
+		# inner 80% of the box
+		steps = 0.1 + 0.8 * (np.arange(gridSize) + 0.5) / gridSize
+		(fx, fy) = np.meshgrid(steps, steps)
+		self.offsets = np.stack([fx.ravel(), fy.ravel()], axis=1)
+
+		self.gray = None
+		self.boxes = np.zeros((0, 4), dtype="float")
+		self.points = None
+
+	def _seed(self):
+		# seed a grid of points in every box, as an (N * k, 1, 2) array
+		# as expected by cv2.calcOpticalFlowPyrLK
+		origin = self.boxes[:, None, :2]
+		size = (self.boxes[:, 2:] - self.boxes[:, :2])[:, None, :]
+		points = origin + size * self.offsets[None, :, :]
+		self.points = points.reshape(-1, 1, 2).astype("float32")
+
+	def start(self, rgb, boxes):
+		self.gray = cv2.cvtColor(rgb, cv2.COLOR_RGB2GRAY)
+		self.boxes = np.asarray(boxes, dtype="float").reshape(-1, 4)
+		self._seed()
+
+	def update(self, rgb):
+		gray = cv2.cvtColor(rgb, cv2.COLOR_RGB2GRAY)
+		N = len(self.boxes)
+		if N == 0:
+			self.gray = gray
+			return np.zeros((0, 4), dtype="int"), np.zeros(0, dtype="float")
+
+		# propagate the points of every box with a single optical flow
+		# call
+		(moved, status, _) = cv2.calcOpticalFlowPyrLK(self.gray, gray,
+			self.points, None, winSize=self.winSize, maxLevel=self.maxLevel)
+
+		# each box moves by the median displacement of its successfully
+		# tracked points, boxes without any tracked point stay in place
+		k = len(self.offsets)
+		ok = status.reshape(N, k) == 1
+		displacement = (moved - self.points).reshape(N, k, 2)
+		displacement[~ok] = np.nan
+		confidences = ok.mean(axis=1)
+		displacement[confidences == 0] = 0
+		shift = np.nanmedian(displacement, axis=1)
+
+		self.boxes += np.hstack([shift, shift])
+
+		# reseed the grid on the moved boxes so the points do not drift
+		# away from the objects
+		self.gray = gray
+		self._seed()
+
+		return self.boxes.astype("int"), confidences
+
+	def __len__(self):
+		return len(self.boxes)
+
+def create_tracker(name, threads=1):
+	"""
+	Function to create a short-term tracker engine.
+
+	Args:
+		name -> 'dlib' (correlation trackers) or 'flow' (sparse optical flow).
+		threads -> number of threads updating the dlib trackers.
+	Returns:
+		ShortTermTracker.
+	"""
+	if name == 'dlib':
+		return DlibTracker(threads=threads)
+	if name == 'flow':
+		return OpticalFlowTracker()
+	raise ValueError('unknown tracker engine: {}'.format(name))
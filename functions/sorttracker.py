@@ -0,0 +1,144 @@
+# import the necessary packages
+from scipy.optimize import linear_sum_assignment
+from object_detection.utils import np_box_ops
+import numpy as np
+from functions.objecttracker import ObjectTracker
+
+# constant velocity model on the state (cx, cy, s, r, vx, vy, vs) where
+# (cx, cy) is the centre of the box, s its area and r its aspect ratio,
+# the measurement is (cx, cy, s, r)
+F = np.eye(7)
+F[0, 4] = F[1, 5] = F[2, 6] = 1.0
+H = np.eye(4, 7)
+
+# measurement and process noise, as in SORT (Bewley et al., 2016)
+R = np.diag([1.0, 1.0, 10.0, 10.0])
+Q = np.diag([1.0, 1.0, 1.0, 1.0, 0.01, 0.01, 0.0001])
+P0 = np.diag([10.0, 10.0, 10.0, 10.0, 1e4, 1e4, 1e4])
+
+def boxes_to_measurements(rects):
+	# convert (xmin, ymin, xmax, ymax) boxes to (cx, cy, s, r)
+	rects = np.asarray(rects, dtype="float").reshape(-1, 4)
+	w = rects[:, 2] - rects[:, 0]
+	h = rects[:, 3] - rects[:, 1]
+	return np.stack([rects[:, 0] + w / 2.0, rects[:, 1] + h / 2.0, w * h,
+		w / np.maximum(h, 1e-6)], axis=1)
+
+def states_to_boxes(X):
+	# convert (cx, cy, s, r, ...) states to (ymin, xmin, ymax, xmax)
+	# boxes, the layout used by np_box_ops
+	s = np.maximum(X[:, 2], 0.0)
+	w = np.sqrt(s * np.maximum(X[:, 3], 0.0))
+	h = s / np.maximum(w, 1e-6)
+	return np.stack([X[:, 1] - h / 2.0, X[:, 0] - w / 2.0,
+		X[:, 1] + h / 2.0, X[:, 0] + w / 2.0], axis=1)
+
+class SortTracker(ObjectTracker):
+	def __init__(self, maxDisappeared=50, iouThreshold=0.3):
+		# initialize the object IDs and their callbacks along with the
+		# arrays holding the object IDs, the Kalman state and covariance
+		# of every track, its last centroid and the number of
+		# consecutive frames it has been marked as "disappeared"
+		ObjectTracker.__init__(self)
+		self.ids = np.zeros(0, dtype="int64")
+		self.X = np.zeros((0, 7))
+		self.P = np.zeros((0, 7, 7))
+		self.centroids = np.zeros((0, 2), dtype="int")
+		self.missing = np.zeros(0, dtype="int")
+
+		# store the number of maximum consecutive frames a given
+		# object is allowed to be marked as "disappeared" and the
+		# minimum IoU between a predicted box and a box of the frame
+		# for them to be associated
+		self.maxDisappeared = maxDisappeared
+		self.iouThreshold = iouThreshold
+
+	@property
+	def count(self):
+		# every track is live
+		return len(self.ids)
+
+	def register(self, rects):
+		# start a track with zero velocity for every box
+		z = boxes_to_measurements(rects)
+		k = len(z)
+		centroids = z[:, :2].astype("int")
+		ids = self.next_ids(centroids)
+
+		self.ids = np.concatenate([self.ids, ids])
+		self.X = np.concatenate([self.X, np.hstack([z, np.zeros((k, 3))])])
+		self.P = np.concatenate([self.P, np.repeat(P0[None], k, axis=0)])
+		self.centroids = np.concatenate([self.centroids, centroids])
+		self.missing = np.concatenate([self.missing, np.zeros(k, dtype="int")])
+
+		self.notify(self.registerCallbacks, ids, centroids)
+
+	def deregister(self, objectIDs):
+		# drop the tracks of the object IDs
+		keep = ~np.isin(self.ids, objectIDs)
+
+		self.notify(self.deregisterCallbacks, self.ids[~keep], self.centroids[~keep])
+
+		self.ids = self.ids[keep]
+		self.X = self.X[keep]
+		self.P = self.P[keep]
+		self.centroids = self.centroids[keep]
+		self.missing = self.missing[keep]
+
+	def predict(self):
+		# advance every track by one frame, keeping the area positive
+		self.X[self.X[:, 2] + self.X[:, 6] <= 0, 6] = 0.0
+		self.X = self.X @ F.T
+		self.P = F @ self.P @ F.T + Q
+		self.centroids = self.X[:, :2].astype("int")
+
+	def correct(self, rows, rects):
+		# Kalman update of the matched tracks with their boxes
+		z = boxes_to_measurements(rects)
+		X = self.X[rows]
+		P = self.P[rows]
+		S = H @ P @ H.T + R
+		K = P @ H.T @ np.linalg.inv(S)
+		y = z - X @ H.T
+		self.X[rows] = X + (K @ y[:, :, None])[:, :, 0]
+		self.P[rows] = (np.eye(7) - K @ H) @ P
+
+	def update(self, rects):
+		# predict where every track is on this frame
+		self.predict()
+
+		rects = np.asarray(rects, dtype="float").reshape(-1, 4)
+		rows = np.zeros(0, dtype="int")
+		cols = np.zeros(0, dtype="int")
+
+		if len(self.ids) > 0 and len(rects) > 0:
+			# associate the predicted boxes with the boxes of the frame
+			# by maximum total IoU, dropping pairs under the threshold
+			iou = np_box_ops.iou(states_to_boxes(self.X), rects[:, [1, 0, 3, 2]])
+			(rows, cols) = linear_sum_assignment(-iou)
+			valid = iou[rows, cols] >= self.iouThreshold
+			(rows, cols) = (rows[valid], cols[valid])
+
+			# correct the matched tracks, their centroid is the centroid
+			# of their box on this frame
+			self.correct(rows, rects[cols])
+			self.centroids[rows] = ((rects[cols, :2] + rects[cols, 2:]) / 2.0).astype("int")
+			self.missing[rows] = 0
+
+		# every unmatched track is marked as disappeared, the ones
+		# missing for too long are deregistered
+		unusedRows = np.ones(len(self.ids), dtype=bool)
+		unusedRows[rows] = False
+		self.missing[unusedRows] += 1
+		expired = self.missing > self.maxDisappeared
+		if expired.any():
+			self.deregister(self.ids[expired])
+
+		# every unmatched box starts a new track
+		unusedCols = np.ones(len(rects), dtype=bool)
+		unusedCols[cols] = False
+		if unusedCols.any():
+			self.register(rects[unusedCols])
+
+		# return the set of trackable objects
+		return self.objects
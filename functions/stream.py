@@ -0,0 +1,88 @@
+# import the necessary packages
+import time
+
+class Stream:
+	def __init__(self, name, source, counter, trackers, output=None, logger=None,
+		worker=None, scheduler=None, gate=None, profiler=None, tracks=None, writer=None):
+		# store the name of the stream (used as window title), its frame
+		# source, its people counter, the path of its output video, the
+		# VideoSink writing it and its logger
+		self.name = name
+		self.source = source
+		self.counter = counter
+		self.output = output
+		self.writer = writer
+		self.logger = logger
+
+		# optional MOTWriter of the tracked boxes of every frame
+		self.tracks = tracks
+
+		# per-stream tracking state: the short-term tracker, the number
+		# of processed frames and the size of the frames
+		self.trackers = trackers
+		self.framecount = 0
+		self.W = None
+		self.H = None
+
+		# the frame currently processed and the detections computed for
+		# it by a batched detection call, if any
+		self.image = None
+		self.rgb = None
+		self.detections = None
+
+		# the scheduler deciding on which frames the detector runs, and
+		# the motion gate deciding which frames are processed at all
+		self.scheduler = scheduler
+		self.gate = gate
+		self.moving = True
+
+		# the detector worker of the asynchronous detection
+		self.worker = worker
+
+		# optional StageProfiler timing the capture and the motion gate
+		self.profiler = profiler
+
+		self.ended = False
+
+	def read(self):
+		# pop the next frame of the stream and mark the stream as ended
+		# once the source runs out of frames
+		start = time.perf_counter()
+		(self.image, self.rgb) = self.source.read()
+		self.detections = None
+		if self.profiler is not None:
+			self.profiler.add('capture', time.perf_counter() - start)
+
+		if self.image is None:
+			self.ended = True
+			return self.image
+
+		if self.W is None or self.H is None:
+			(self.H, self.W) = self.image.shape[:2]
+
+		# frames without motion skip detection and tracking
+		if self.gate is not None:
+			start = time.perf_counter()
+			self.moving = self.gate.update(self.image)
+			if self.profiler is not None:
+				self.profiler.add('motion', time.perf_counter() - start)
+
+		return self.image
+
+	def close(self):
+		# release every resource held by the stream
+		if self.writer is not None:
+			self.writer.close()
+
+		if self.logger is not None:
+			self.logger.close()
+
+		if self.tracks is not None:
+			self.tracks.close()
+
+		if self.worker is not None:
+			self.worker.stop()
+
+		self.trackers.close()
+
+		self.source.stop()
@@ -0,0 +1,142 @@
+# import the necessary packages
+import numpy as np
+import cv2
+
+# grey level of the background of the synthetic scenes, the stub
+# detector finds the people as blobs far from it
+BACKGROUND = 110
+
+def synthetic_crowd(path, people=10, frames=300, width=800, height=600, fps=30,
+	seed=0, gtPath=None):
+	"""
+	Write a deterministic video of textured people-sized boxes walking up
+	and down across the frame, over a lightly textured background.
+
+	Args:
+		path -> path of the video (MJPG in an .avi container).
+		people -> average number of people in the scene at any time.
+		frames -> number of frames.
+		width, height -> size of the frames.
+		fps -> frame rate of the video.
+		seed -> random seed, the same arguments always give the same video.
+		gtPath -> optional path of the ground truth tracks, written in the
+			MOTChallenge format (frame, id, left, top, width, height, 1,
+			-1, -1, -1) with 1-based frame numbers.
+	Returns:
+		dict with the number of people expected to be counted going 'up'
+		and 'down' by PeopleCounter: people whose visible centre moves
+		more than a fifth of the frame height from where it first
+		appeared.
+	"""
+	rng = np.random.RandomState(seed)
+
+	# people are scaled with the frame, walk at 1 to 3 pixels per frame
+	# (at 600 pixels high) and enter at a rate keeping the average
+	# number of people in the scene
+	(pw, ph) = (max(int(width / 20), 8), max(int(height / 7.5), 16))
+	scale = height / 600.0
+	crossing = (height + ph) / (2.0 * scale)
+	rate = people / crossing
+
+	walkers = []
+	start = -int(crossing)
+	for t in range(start, frames):
+		for _ in range(rng.poisson(rate)):
+			up = rng.rand() < 0.5
+			speed = rng.uniform(1.0, 3.0) * scale
+			x = int(rng.uniform(0, width - pw))
+			colour = rng.choice([rng.randint(0, 40), rng.randint(190, 256)], size=3)
+			sprite = np.clip(colour + rng.randint(-15, 16, (ph, pw, 3)), 0, 255).astype(np.uint8)
+			walkers.append((t, up, speed, x, sprite))
+
+	background = np.clip(BACKGROUND + rng.randint(-8, 9, (height, width, 3)), 0, 255).astype(np.uint8)
+
+	writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), fps, (width, height), True)
+	gt = open(gtPath, 'w') if gtPath is not None else None
+	counts = {'up': 0, 'down': 0}
+
+	# first visible centre of every person and the people already
+	# counted, as PeopleCounter does for its tracks
+	first = {}
+	counted = set()
+
+	for i in range(frames):
+		frame = background.copy()
+		for (objectID, (t, up, speed, x, sprite)) in enumerate(walkers):
+			# top of the box, walking from below the frame up or from
+			# above the frame down
+			travel = (i - t) * speed
+			y = int(height - travel) if up else int(travel - ph)
+			if i < t or y >= height or y + ph <= 0:
+				continue
+
+			(top, bottom) = (max(y, 0), min(y + ph, height))
+
+			# a person counts once its visible centre moved more than a
+			# fifth of the frame height from its first visible centre
+			centre = (top + bottom) / 2.0
+			start = first.setdefault(objectID, centre)
+			if objectID not in counted and abs(centre - start) > height / 5.0:
+				counts['up' if centre < start else 'down'] += 1
+				counted.add(objectID)
+
+			frame[top:bottom, x:x + pw] = sprite[top - y:bottom - y]
+			if gt is not None:
+				gt.write('{},{},{},{},{},{},1,-1,-1,-1\n'.format(i + 1, objectID + 1,
+					x, top, pw, bottom - top))
+
+		writer.write(frame)
+
+	writer.release()
+	if gt is not None:
+		gt.close()
+
+	return counts
+
+class StubDetector:
+	def __init__(self, threshold=40, minArea=0.001):
+		# report every blob far enough from the background of the
+		# synthetic scenes as a person with full confidence, to
+		# benchmark the pipeline without the detection weights
+		self.threshold = threshold
+		self.minArea = minArea
+
+		# batches of frames of different sizes are padded with the
+		# background level instead of zeros, so the padding is not
+		# found as a blob
+		self.padValue = BACKGROUND
+
+	def detect(self, images):
+		"""
+		Run the detector on a batch of frames.
+
+		Args:
+			images -> uint8 numpy array of shape [N, H, W, 3].
+		Returns:
+			boxes -> [N, K, 4] normalized (ymin, xmin, ymax, xmax) boxes.
+			classes -> [N, K] label map class IDs (1, person).
+			scores -> [N, K] scores, 0 for the padding boxes.
+		"""
+		results = []
+		for image in images:
+			(H, W) = image.shape[:2]
+			diff = np.abs(image.astype("int16") - BACKGROUND).max(axis=2)
+			mask = (diff > self.threshold).astype(np.uint8)
+			(n, _, stats, _) = cv2.connectedComponentsWithStats(mask)
+
+			# drop the background component and the specks
+			stats = stats[1:]
+			stats = stats[stats[:, cv2.CC_STAT_AREA] >= self.minArea * H * W]
+			(x, y, w, h) = [stats[:, k] for k in (cv2.CC_STAT_LEFT,
+				cv2.CC_STAT_TOP, cv2.CC_STAT_WIDTH, cv2.CC_STAT_HEIGHT)]
+			results.append(np.stack([y / H, x / W, (y + h) / H, (x + w) / W], axis=1))
+
+		K = max([len(boxes) for boxes in results] + [1])
+		boxes = np.zeros((len(images), K, 4), dtype=np.float32)
+		classes = np.ones((len(images), K), dtype=int)
+		scores = np.zeros((len(images), K), dtype=np.float32)
+		for (i, found) in enumerate(results):
+			boxes[i, :len(found)] = found
+			scores[i, :len(found)] = 1.0
+
+		return boxes, classes, scores
@@ -0,0 +1,145 @@
+# import the necessary packages
+from threading import Lock, local
+import numpy as np
+import cv2
+
+def load_interpreter(path, threads=1):
+	"""
+	Load a TFLite model on the standalone TFLite runtime, which is enough
+	on edge devices. The full TensorFlow interpreter is used when the
+	runtime is not installed, or when the model holds TensorFlow (Flex)
+	ops the runtime has no kernel for.
+
+	Args:
+		path -> path of the .tflite model.
+		threads -> number of CPU threads of the interpreter.
+	Returns:
+		interpreter with its tensors allocated.
+	"""
+	try:
+		from tflite_runtime.interpreter import Interpreter
+		interpreter = Interpreter(model_path=path, num_threads=threads)
+		interpreter.allocate_tensors()
+		return interpreter
+	except ImportError:
+		pass
+	except RuntimeError as e:
+		if 'Flex' not in str(e) and 'Select TensorFlow op' not in str(e):
+			raise
+		print('[INFO] {} needs TensorFlow (Flex) ops, loading it with tensorflow.lite'.format(path))
+
+	from tensorflow.lite import Interpreter
+	interpreter = Interpreter(model_path=path, num_threads=threads)
+	interpreter.allocate_tensors()
+	return interpreter
+
+class TFLiteDetector:
+	def __init__(self, path, threads=1):
+		# load a TFLite detector whose outputs, sorted by name, start
+		# with the boxes, the 0-based classes and the scores: an SSD
+		# with the TFLite_Detection_PostProcess op exported by
+		# object_detection/export_tflite_ssd_graph.py, or a model
+		# converted by quantize_models.py, float models run on the
+		# XNNPACK delegate that the interpreter applies by default on CPU
+		self.interpreter = load_interpreter(path, threads)
+
+		# the model takes a single frame of a fixed size, the frames are
+		# resized and converted into preallocated buffers
+		inputDetails = self.interpreter.get_input_details()[0]
+		self.inputIndex = inputDetails['index']
+		(_, self.height, self.width, _) = inputDetails['shape']
+		self.inputType = inputDetails['dtype']
+		(self.inputScale, self.inputZeroPoint) = inputDetails['quantization']
+		self.resized = np.empty((self.height, self.width, 3), dtype=np.uint8)
+		self.normalized = np.empty((self.height, self.width, 3), dtype=np.float32)
+		self.input = np.empty((1, self.height, self.width, 3), dtype=self.inputType)
+
+		# the outputs are the boxes, the classes and the scores in that
+		# order of names, followed by the number of detections for SSDs
+		outputDetails = sorted(self.interpreter.get_output_details(),
+			key=lambda detail: detail['name'])
+		self.outputIndexes = [detail['index'] for detail in outputDetails[:3]]
+		self.maxDetections = outputDetails[0]['shape'][1]
+
+		# the outputs are read through views of the interpreter tensors
+		# rather than copied by get_tensor, each view only lives until
+		# the next invoke
+		self.outputTensors = [self.interpreter.tensor(index) for index in self.outputIndexes]
+
+		# the outputs of single frames, the common case, are copied into
+		# preallocated buffers, one set per calling thread since the
+		# streams with a detector worker read their results outside the
+		# lock
+		self.buffers = local()
+
+		# the interpreter is not thread safe, the streams with a detector
+		# worker take turns
+		self.lock = Lock()
+
+	def _set_input(self, image):
+		# resize the frame into the input buffer, uint8 models take the
+		# pixels, float models pixels in [-1, 1] and quantized models the
+		# quantized value of the same input
+		cv2.resize(image, (self.width, self.height), dst=self.resized,
+			interpolation=cv2.INTER_AREA)
+		if self.inputType == np.uint8 and self.inputScale == 0:
+			self.input[0] = self.resized
+		elif self.inputType == np.float32:
+			np.multiply(self.resized, 1.0 / 127.5, out=self.input[0])
+			self.input -= 1.0
+		else:
+			info = np.iinfo(self.inputType)
+			np.multiply(self.resized, 1.0 / (127.5 * self.inputScale), out=self.normalized)
+			self.normalized += self.inputZeroPoint - 1.0 / self.inputScale
+			np.rint(self.normalized, out=self.normalized)
+			np.clip(self.normalized, info.min, info.max, out=self.normalized)
+			self.input[0] = self.normalized
+		self.interpreter.set_tensor(self.inputIndex, self.input)
+
+	def detect(self, images):
+		"""
+		Run the detector on a batch of frames.
+
+		Args:
+			images -> uint8 numpy array of shape [N, H, W, 3].
+		Returns:
+			boxes -> [N, K, 4] normalized (ymin, xmin, ymax, xmax) boxes.
+			classes -> [N, K] label map class IDs.
+			scores -> [N, K] scores.
+			The arrays of a single frame are reused by the next single
+			frame call of the same thread.
+		"""
+		with self.lock:
+			return self._detect(images)
+
+	def _allocate(self, N):
+		# output arrays of a batch of N frames
+		return (np.empty((N, self.maxDetections, 4), dtype=np.float32),
+			np.empty((N, self.maxDetections), dtype=int),
+			np.empty((N, self.maxDetections), dtype=np.float32))
+
+	def _detect(self, images):
+		# single frames reuse the buffers of the calling thread, they
+		# hold the result until its next call
+		N = len(images)
+		if N == 1:
+			if not hasattr(self.buffers, 'outputs'):
+				self.buffers.outputs = self._allocate(1)
+			(boxes, classes, scores) = self.buffers.outputs
+		else:
+			(boxes, classes, scores) = self._allocate(N)
+
+		label_id_offset = 1
+
+		# the model takes one frame at a time, the outputs are copied
+		# from the interpreter into the batch
+		(boxesTensor, classesTensor, scoresTensor) = self.outputTensors
+		for (i, image) in enumerate(images):
+			self._set_input(image)
+			self.interpreter.invoke()
+			np.copyto(boxes[i], boxesTensor()[0])
+			np.copyto(classes[i], classesTensor()[0], casting='unsafe')
+			classes[i] += label_id_offset
+			np.copyto(scores[i], scoresTensor()[0])
+
+		return boxes, classes, scores
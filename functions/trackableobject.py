@@ -1,23 +1,83 @@
 import collections
+import numpy as np
 
 class TrackableObject:
-	def __init__(self, objectID, centroid):
-		# store the object ID, then initialize a list of centroids
-		# using the current centroid
+	# fixed set of attributes, trackable objects are created for every
+	# person seen by the camera
+	__slots__ = ('objectID', 'history', 'head', 'size', 'start', 'last',
+		'counted')
+
+	def __init__(self, objectID, centroid, capacity=64):
+		# store the object ID, then initialize a fixed-capacity ring
+		# buffer holding the most recent centroids, the index of the
+		# next slot to write and the number of buffered centroids
 		self.objectID = objectID
-		self.centroids = [centroid]
+		self.history = np.zeros((capacity, 2), dtype="int16")
+		self.head = 0
+		self.size = 0
+
+		# cache the first and the last position of the object so the
+		# direction does not depend on the length of the trajectory
+		self.start = (int(centroid[0]), int(centroid[1]))
+		self.last = self.start
+		self.append(centroid)
 
 		# initialize a boolean used to indicate if the object has
 		# already been counted or not
 		self.counted = False
 
+	def append(self, centroid):
+		# write the centroid over the oldest slot of the ring buffer
+		self.history[self.head] = centroid
+		self.head = (self.head + 1) % len(self.history)
+		self.size = min(self.size + 1, len(self.history))
+		self.last = (int(centroid[0]), int(centroid[1]))
+
+	@property
+	def centroids(self):
+		# the buffered centroids from the oldest to the most recent
+		if self.size < len(self.history):
+			return self.history[:self.size].copy()
+		return np.roll(self.history, -self.head, axis=0)
+
+	def direction(self):
+		# vertical displacement between the first and the last position
+		# of the object, negative when the object moves up
+		return self.last[1] - self.start[1]
+
 class GenderObject:
-	def __init__(self, objectID, gender):
+	def __init__(self, objectID, gender=None, maxVotes=3, minConfidence=0.0):
 		# store object ID, then initialize a list of gender
 		self.objectID = objectID
-		self.genders = [gender]
+		self.genders = [] if gender is None else [gender]
 
 		self.gender = None
+
+		# store the number of votes needed before the decision is final
+		# and the minimum classifier confidence for a vote to count
+		self.maxVotes = maxVotes
+		self.minConfidence = minConfidence
+
+	def settled(self):
+		# the decision is final once the vote budget is spent or once
+		# the leading gender holds a majority the remaining votes can
+		# no longer overturn
+		if len(self.genders) >= self.maxVotes:
+			return True
+		if len(self.genders) == 0:
+			return False
+		data = collections.Counter(self.genders)
+		return max(data.values()) * 2 > self.maxVotes
+
+	def vote(self, gender, confidence=1.0):
+		# ignore votes once settled, undetected crops and predictions
+		# below the confidence threshold
+		if self.settled() or gender == 'undetected' or confidence < self.minConfidence:
+			return False
+
+		self.genders.append(gender)
+		self.determine_gender()
+		return True
 	
 	def determine_gender(self):
 		data = collections.Counter(self.genders)
@@ -0,0 +1,122 @@
+# import the necessary packages
+from collections import deque
+from threading import Thread, Condition
+import time
+import cv2
+
+class VideoSink:
+	def __init__(self, path, fourcc="MJPG", fps=30.0, scale=1.0, every=1,
+		queueSize=8, dropFrames=False, profiler=None):
+		# store the path, the codec and the frame rate of the output
+		# video, the scale of the written frames and the number of
+		# frames between two written frames
+		self.path = path
+		self.fourcc = fourcc
+		self.fps = fps
+		self.scale = scale
+		self.every = max(int(every), 1)
+
+		# when the ring is full the frame is either dropped or the
+		# caller waits for the encoding thread (backpressure)
+		self.dropFrames = dropFrames
+		self.dropped = 0
+		self.frames = 0
+
+		# ring of preallocated frame buffers, allocated once the size of
+		# the first frame is known, along with the indexes of the free
+		# slots and of the slots waiting to be encoded
+		self.queueSize = queueSize
+		self.buffers = None
+		self.size = None
+		self.free = deque(range(queueSize))
+		self.ready = deque()
+
+		# optional StageProfiler timing the encoding
+		self.profiler = profiler
+
+		self.writer = None
+		self.cond = Condition()
+		self.stopped = False
+		self.thread = Thread(target=self._run, daemon=True)
+		self.thread.start()
+
+	def _allocate(self, frame):
+		# compute the size of the written frames and preallocate every
+		# buffer of the ring
+		(h, w) = frame.shape[:2]
+		self.size = (max(int(round(w * self.scale)), 1), max(int(round(h * self.scale)), 1))
+		self.buffers = [cv2.resize(frame, self.size) for _ in range(self.queueSize)]
+
+	def write(self, frame):
+		"""
+		Queue a frame for encoding. The frame is copied (and scaled), so the
+		caller can reuse its buffer right away.
+
+		Args:
+			frame -> BGR frame as numpy array.
+		"""
+		index = self.frames
+		self.frames += 1
+		if index % self.every != 0:
+			return
+
+		if self.buffers is None:
+			self._allocate(frame)
+
+		# grab a free slot, dropping the frame or waiting for the
+		# encoding thread when the ring is full
+		with self.cond:
+			while len(self.free) == 0 and not self.stopped:
+				if self.dropFrames:
+					self.dropped += 1
+					return
+				self.cond.wait()
+			if self.stopped:
+				return
+			slot = self.free.popleft()
+
+		# copy the frame into the slot, resizing it on the way if needed
+		if self.size == (frame.shape[1], frame.shape[0]):
+			self.buffers[slot][...] = frame
+		else:
+			cv2.resize(frame, self.size, dst=self.buffers[slot], interpolation=cv2.INTER_AREA)
+
+		with self.cond:
+			self.ready.append(slot)
+			self.cond.notify_all()
+
+	def _run(self):
+		while True:
+			# wait for a frame to encode, the thread ends once stopped and
+			# every queued frame is written
+			with self.cond:
+				while len(self.ready) == 0 and not self.stopped:
+					self.cond.wait()
+				if len(self.ready) == 0:
+					break
+				slot = self.ready.popleft()
+
+			# open the video once the size of the frames is known
+			if self.writer is None:
+				self.writer = cv2.VideoWriter(self.path,
+					cv2.VideoWriter_fourcc(*self.fourcc), self.fps, self.size, True)
+
+			start = time.perf_counter()
+			self.writer.write(self.buffers[slot])
+			if self.profiler is not None:
+				self.profiler.add('encode', time.perf_counter() - start)
+
+			# hand the slot back to the producer
+			with self.cond:
+				self.free.append(slot)
+				self.cond.notify_all()
+
+	def close(self):
+		# write the queued frames, stop the thread and release the video
+		with self.cond:
+			self.stopped = True
+			self.cond.notify_all()
+		self.thread.join()
+
+		if self.writer is not None:
+			self.writer.release()
@@ -0,0 +1,190 @@
+# Post-training int8 quantization
+# Converts the detection model (exported saved_model) and the gender classifier (h5) to TFLite, calibrates
+# int8 versions on a folder of our own frames and reports their latency and accuracy against the float models:
+# - detector: CocoDetectionEvaluator mAP of the int8 detections, with the float detections as ground truth
+# - gender: accuracy on a held-out folder of crops, one sub-folder per class (woman/, man/)
+# The models are written next to the originals (model.tflite, model_int8.tflite and model_int8.tflite for
+# the gender classifier) and loaded by detection_video.py with --backend tflite and --quantized.
+
+import numpy as np
+import argparse
+import json
+import time
+import glob
+import cv2
+import os
+
+import tensorflow as tf
+tf.get_logger().setLevel('ERROR')
+
+from object_detection.metrics.coco_evaluation import CocoDetectionEvaluator
+from object_detection.core import standard_fields as fields
+from functions import label_map_util
+from functions.tflitedetector import TFLiteDetector
+from functions.genderclassifier import GenderClassifier, TFLiteModel
+
+parser = argparse.ArgumentParser()
+
+parser.add_argument('-s', '--saved_model', default = 'models/efficientdet_d0_coco17_tpu-32/saved_model', help = 'detection model exported by object_detection/exporter_main_v2.py (--input_type image_tensor)')
+parser.add_argument('-g', '--gender_model', default = 'models/model.h5', help = 'gender classifier in h5 format')
+parser.add_argument('-f', '--frames', default = 'frames', help = 'folder of frames of our own cameras, half calibrate the int8 models and half evaluate them')
+parser.add_argument('--gender_crops', default = None, help = 'held-out folder of person crops with one sub-folder per gender class (woman/, man/)')
+parser.add_argument('--input_size', default = [600, 800], type = int, nargs = 2, help = 'height and width of the detector input')
+parser.add_argument('--max_frames', default = 200, type = int, help = 'maximum number of frames read from --frames')
+parser.add_argument('-t', '--threshold', default = 0.5, type = float, help = 'minimum score of the float detections used as ground truth')
+parser.add_argument('--threads', default = 1, type = int, help = 'number of CPU threads of the TFLite interpreters')
+parser.add_argument('-o', '--output', default = 'quantization_report.json', help = 'path of the report')
+
+args = parser.parse_args()
+
+def read_images(folder, limit = None):
+    """Function to read the images of a folder, sorted by name, as BGR numpy arrays."""
+    paths = sorted(path for path in glob.glob(os.path.join(folder, '*')) if os.path.splitext(path)[1].lower() in ['.jpg', '.jpeg', '.png', '.bmp'])
+    images = [cv2.imread(path) for path in paths[:limit]]
+    return [image for image in images if image is not None]
+
+def latency(fn, inputs):
+    """Function to measure the median latency of fn over the inputs, in milliseconds."""
+    times = []
+    for x in inputs:
+        start_time = time.time()
+        fn(x)
+        times.append(1000.0 * (time.time() - start_time))
+    return float(np.median(times))
+
+frames = read_images(args.frames, args.max_frames)
+if len(frames) < 2:
+    raise ValueError('at least 2 frames are needed in {}'.format(args.frames))
+calibration, evaluation = frames[0::2], frames[1::2]
+(H, W) = args.input_size
+print('[INFO] {} calibration frames, {} evaluation frames'.format(len(calibration), len(evaluation)))
+
+# ---------------- DETECTOR ----------------
+# The exported signature takes one uint8 frame of any size. The TFLite models take a fixed size and output the
+# boxes, the 0-based classes and the scores, as TFLiteDetector expects.
+model = tf.saved_model.load(args.saved_model)
+
+@tf.function(input_signature=[tf.TensorSpec([1, H, W, 3], tf.uint8)])
+def detect_fn(image):
+    detections = model(image)
+    return (detections['detection_boxes'], detections['detection_classes'] - 1.0, detections['detection_scores'])
+
+def detector_dataset():
+    """Function to feed the calibration frames to the converter."""
+    for image in calibration:
+        yield [cv2.resize(image, (W, H), interpolation=cv2.INTER_AREA)[None]]
+
+def convert_detector(int8, flex):
+    """Function to convert the detector to TFLite, calibrated to int8 or left in float, with TensorFlow (Flex) ops or builtins only."""
+    converter = tf.lite.TFLiteConverter.from_concrete_functions([detect_fn.get_concrete_function()])
+    converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS]
+    if flex:
+        converter.target_spec.supported_ops.append(tf.lite.OpsSet.SELECT_TF_OPS)
+    if int8:
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = detector_dataset
+    return converter.convert()
+
+# The detector is converted with TFLite builtins only, so it runs on the standalone tflite_runtime. When the
+# post-processing (non max suppression) has no builtin kernel it is converted with TensorFlow (Flex) ops
+# instead, which the report records: such a model needs the full TensorFlow package to run.
+model_dir = os.path.dirname(os.path.normpath(args.saved_model))
+paths = {'float': os.path.join(model_dir, 'model.tflite'), 'int8': os.path.join(model_dir, 'model_int8.tflite')}
+needs_flex = {}
+for (name, path) in paths.items():
+    print('[INFO] converting detector ({}) ...'.format(name))
+    try:
+        tflite_model = convert_detector(name == 'int8', flex = False)
+        needs_flex[name] = False
+    except Exception as e:
+        print('[INFO] builtin ops are not enough ({}), converting with TensorFlow (Flex) ops'.format(str(e).splitlines()[0]))
+        tflite_model = convert_detector(name == 'int8', flex = True)
+        needs_flex[name] = True
+    with open(path, 'wb') as f:
+        f.write(tflite_model)
+
+detectors = {name: TFLiteDetector(path, threads = args.threads) for (name, path) in paths.items()}
+
+# Accuracy: the float detections above the threshold are the ground truth of the int8 detections
+categories = label_map_util.create_categories_from_labelmap(os.path.join('label', 'mscoco_label_map.pbtxt'))
+evaluator = CocoDetectionEvaluator(categories)
+for (i, image) in enumerate(evaluation):
+    scale = np.array([image.shape[0], image.shape[1], image.shape[0], image.shape[1]])
+    boxes, classes, scores = detectors['float'].detect(image[None])
+    keep = scores[0] >= args.threshold
+    evaluator.add_single_ground_truth_image_info(i, {
+        fields.InputDataFields.groundtruth_boxes: (boxes[0][keep] * scale).astype(np.float32),
+        fields.InputDataFields.groundtruth_classes: classes[0][keep]})
+
+    boxes, classes, scores = detectors['int8'].detect(image[None])
+    evaluator.add_single_detected_image_info(i, {
+        fields.DetectionResultFields.detection_boxes: (boxes[0] * scale).astype(np.float32),
+        fields.DetectionResultFields.detection_scores: scores[0],
+        fields.DetectionResultFields.detection_classes: classes[0]})
+metrics = evaluator.evaluate()
+
+report = {'detector': {
+    'latency_ms': {
+        'saved_model': latency(lambda image: model(tf.convert_to_tensor(image[None])), evaluation),
+        'float': latency(lambda image: detectors['float'].detect(image[None]), evaluation),
+        'int8': latency(lambda image: detectors['int8'].detect(image[None]), evaluation)},
+    'int8_vs_float_mAP': metrics['DetectionBoxes_Precision/mAP'],
+    'int8_vs_float_mAP@.50IOU': metrics['DetectionBoxes_Precision/mAP@.50IOU'],
+    'size_mb': {name: os.path.getsize(path) / 1e6 for (name, path) in paths.items()},
+    'needs_flex': needs_flex}}
+if any(needs_flex.values()):
+    print('[WARNING] the detector holds TensorFlow (Flex) ops, it runs with the full TensorFlow package only (not tflite_runtime)')
+
+# ---------------- GENDER CLASSIFIER ----------------
+# Calibrated on the person crops the float detector finds in the calibration frames
+print('[INFO] converting gender classifier ...')
+keras_model = tf.keras.models.load_model(args.gender_model)
+g_classes = ['woman', 'man']
+float_classifier = GenderClassifier(keras_model, g_classes)
+
+crops = []
+for image in calibration:
+    boxes, classes, scores = detectors['float'].detect(image[None])
+    for (ymin, xmin, ymax, xmax) in boxes[0][(scores[0] >= args.threshold) & (classes[0] == 1)]:
+        crop = float_classifier.preprocess(image, (xmin * image.shape[1], ymin * image.shape[0], xmax * image.shape[1], ymax * image.shape[0]))
+        if crop is not None:
+            crops.append(crop)
+if len(crops) == 0:
+    crops = [float_classifier.preprocess(image, (0, 0, image.shape[1], image.shape[0])) for image in calibration]
+
+def gender_dataset():
+    """Function to feed the calibration crops to the converter, normalized like GenderClassifier."""
+    for crop in crops:
+        yield [crop[None].astype(np.float32) / 255.0]
+
+# The h5 model may take crops of any size, the TFLite model is given the fixed input size GenderClassifier resizes
+# the crops to (only the batch size stays free)
+(gh, gw) = float_classifier.inputSize
+gender_fn = tf.function(lambda x: keras_model(x, training = False),
+    input_signature = [tf.TensorSpec([None, gh, gw, float_classifier.channels], tf.float32)])
+converter = tf.lite.TFLiteConverter.from_concrete_functions([gender_fn.get_concrete_function()])
+converter.optimizations = [tf.lite.Optimize.DEFAULT]
+converter.representative_dataset = gender_dataset
+gender_path = os.path.splitext(args.gender_model)[0] + '_int8.tflite'
+with open(gender_path, 'wb') as f:
+    f.write(converter.convert())
+
+int8_classifier = GenderClassifier(TFLiteModel(gender_path, threads = args.threads), g_classes)
+report['gender'] = {'size_mb': {'float': os.path.getsize(args.gender_model) / 1e6, 'int8': os.path.getsize(gender_path) / 1e6}}
+
+if args.gender_crops is not None:
+    samples = [(image, label) for label in g_classes for image in read_images(os.path.join(args.gender_crops, label))]
+    report['gender']['samples'] = len(samples)
+    for (name, classifier) in [('float', float_classifier), ('int8', int8_classifier)]:
+        correct = 0
+        for (image, label) in samples:
+            probs = classifier.classify(image, {0: (0, 0, image.shape[1], image.shape[0])})[0]
+            correct += classifier.label(probs) == label
+        report['gender'].setdefault('accuracy', {})[name] = correct / float(max(len(samples), 1))
+        report['gender'].setdefault('latency_ms', {})[name] = latency(
+            lambda image: classifier.classify(image, {0: (0, 0, image.shape[1], image.shape[0])}), [image for (image, label) in samples])
+
+with open(args.output, 'w') as f:
+    json.dump(report, f, indent = 2)
+print(json.dumps(report, indent = 2))
+print('[INFO] report written to {}'.format(args.output))